@@ -9,6 +9,11 @@ from .models import (
     Inquiry,
     InquiryAnswer,
     Like,
+    PostScore,
+    Tombstone,
+    Bed,
+    OutingRollup,
+    PointTransaction,
 )
 
 admin.site.register(Dorm)
@@ -20,3 +25,21 @@ admin.site.register(UserProfile)
 admin.site.register(Inquiry)
 admin.site.register(InquiryAnswer)
 admin.site.register(Like)
+admin.site.register(PostScore)
+admin.site.register(Tombstone)
+admin.site.register(Bed)
+admin.site.register(OutingRollup)
+
+
+@admin.register(PointTransaction)
+class PointTransactionAdmin(admin.ModelAdmin):
+    # The ledger is append-only; corrections are new transactions.
+    list_display = ('user', 'point_type', 'points', 'reason', 'awarded_by', 'created_at')
+    list_filter = ('point_type',)
+    search_fields = ('user__username',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,171 @@
+from collections import defaultdict, deque
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from .models import Bed, Dorm
+from .occupancy import create_beds, sync_beds
+
+GENDERS = {value for value, _ in Dorm.GENDER_CHOICES}
+MAX_BEDS = max(value for value, _ in Dorm._meta.get_field('position').choices)
+
+PRIORITIES = {
+    # Highest net score first; ties go to whoever applied first.
+    'net_points': ('-net_points', 'id'),
+    'reward': ('-reward', 'id'),
+    'penalty': ('penalty', 'id'),
+    'applied': ('id',),
+}
+
+
+class AllocationError(ValueError):
+    pass
+
+
+def _room_numbers(building):
+    if 'rooms' in building:
+        rooms = building['rooms']
+        if not isinstance(rooms, list) or not all(isinstance(r, int) and r > 0 for r in rooms):
+            raise AllocationError(f"{building.get('name')}: rooms must be a list of positive integers.")
+        if len(set(rooms)) != len(rooms):
+            raise AllocationError(f"{building.get('name')}: rooms must not repeat.")
+        return rooms
+    floors = building.get('floors')
+    per_floor = building.get('rooms_per_floor')
+    if not isinstance(floors, list) or not isinstance(per_floor, int) or per_floor <= 0:
+        raise AllocationError(f"{building.get('name')}: give either rooms, or floors and rooms_per_floor.")
+    # Room numbers are floor * 100 + n, so a floor holds at most 99 rooms.
+    if per_floor > 99:
+        raise AllocationError(f"{building.get('name')}: rooms_per_floor must be at most 99.")
+    if not all(isinstance(f, int) and f >= 0 for f in floors) or len(set(floors)) != len(floors):
+        raise AllocationError(f"{building.get('name')}: floors must be distinct non-negative integers.")
+    return [floor * 100 + n for floor in floors for n in range(1, per_floor + 1)]
+
+
+def parse_buildings(buildings):
+    """
+    Validate building definitions such as
+    ``{"name": "A동", "gender": "male", "beds": 2, "floors": [2, 3], "rooms_per_floor": 20}``
+    (or an explicit ``"rooms": [201, 202]``) and return them normalised.
+    """
+    if not isinstance(buildings, list) or not buildings:
+        raise AllocationError("buildings must be a non-empty list.")
+    parsed = []
+    seen = set()
+    for building in buildings:
+        if not isinstance(building, dict):
+            raise AllocationError("each building must be an object.")
+        name = building.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise AllocationError("each building needs a name.")
+        if name in seen:
+            raise AllocationError(f"{name}: building listed twice.")
+        seen.add(name)
+        if building.get('gender') not in GENDERS:
+            raise AllocationError(f"{name}: gender must be one of {', '.join(sorted(GENDERS))}.")
+        beds = building.get('beds')
+        if not isinstance(beds, int) or not 1 <= beds <= MAX_BEDS:
+            raise AllocationError(f"{name}: beds must be between 1 and {MAX_BEDS}.")
+        parsed.append({
+            'name': name,
+            'gender': building['gender'],
+            'beds': beds,
+            'rooms': _room_numbers(building),
+        })
+    return parsed
+
+
+def _free_beds(buildings, occupied, beds):
+    """
+    Free beds per gender, filling each room before moving to the next.
+    A bed that already has a Bed row keeps that row's gender and is only
+    free while the row has no occupant; the others take the building's.
+    """
+    free = defaultdict(deque)
+    queued = set()
+    for building in buildings:
+        for room in building['rooms']:
+            for position in range(1, building['beds'] + 1):
+                bed = (building['name'], room, position)
+                if bed in occupied or bed in queued:
+                    continue
+                queued.add(bed)
+                if bed not in beds:
+                    free[building['gender']].append(bed)
+                elif beds[bed][1] is None:
+                    free[beds[bed][0]].append(bed)
+    return free
+
+
+def _applicants(priority, lock):
+    queryset = Dorm.objects.filter(building_name='')
+    if lock:
+        queryset = queryset.select_for_update()
+    queryset = queryset.annotate(
+        reward=Coalesce(F('user__userprofile__reward_point'), Value(0)),
+        penalty=Coalesce(F('user__userprofile__penalty_point'), Value(0)),
+        net_points=Coalesce(F('user__userprofile__net_point'), Value(0)),
+    )
+    return queryset.order_by(*PRIORITIES[priority]).values_list('id', 'gender')
+
+
+def allocate_rooms(buildings, priority='net_points', dry_run=False, batch_size=1000):
+    """
+    Assign a bed to every applicant whose building_name is empty, in
+    ``priority`` order, without mixing genders or overfilling rooms.
+    Beds already taken by existing assignments are skipped, and beds that
+    already exist in the inventory keep their gender. The bed
+    inventory is created for every listed building, and all writes go out
+    as bulk statements inside a single transaction; ``dry_run`` only
+    reports what would happen. Raises BedUnavailable if a bed is taken by a
+    concurrent assignment while the run is in progress.
+    """
+    if priority not in PRIORITIES:
+        raise AllocationError(f"priority must be one of {', '.join(PRIORITIES)}.")
+    buildings = parse_buildings(buildings)
+    names = [b['name'] for b in buildings]
+
+    with transaction.atomic():
+        occupied = set(
+            Dorm.objects.filter(building_name__in=names)
+            .values_list('building_name', 'r_number', 'position')
+        )
+        beds = {
+            (building_name, r_number, position): (gender, occupant_id)
+            for building_name, r_number, position, gender, occupant_id in Bed.objects.filter(
+                building_name__in=names
+            ).values_list('building_name', 'r_number', 'position', 'gender', 'occupant_id')
+        }
+        free = _free_beds(buildings, occupied, beds)
+
+        assignments = []
+        waiting = defaultdict(int)
+        for dorm_id, gender in _applicants(priority, lock=not dry_run).iterator(chunk_size=2000):
+            beds = free.get(gender)
+            if not beds:
+                waiting[gender] += 1
+                continue
+            building_name, r_number, position = beds.popleft()
+            assignments.append(Dorm(
+                id=dorm_id, gender=gender, building_name=building_name, r_number=r_number, position=position
+            ))
+
+        if not dry_run:
+            create_beds(buildings)
+        if not dry_run and assignments:
+            sync_beds(assignments)
+            Dorm.objects.bulk_update(
+                assignments, ['building_name', 'r_number', 'position'], batch_size=batch_size
+            )
+
+    return {
+        'dry_run': dry_run,
+        'assigned': len(assignments),
+        'unassigned': dict(waiting),
+        'free_beds': {gender: len(beds) for gender, beds in free.items()},
+        'assignments': [
+            {'id': d.id, 'building_name': d.building_name, 'r_number': d.r_number, 'position': d.position}
+            for d in assignments
+        ],
+    }
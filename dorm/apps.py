@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DormConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dorm'
+
+    def ready(self):
+        from .indexes import create_search_indexes, create_user_email_index
+        post_migrate.connect(create_user_email_index, sender=self)
+        post_migrate.connect(create_search_indexes, sender=self)
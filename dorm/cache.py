@@ -0,0 +1,59 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+NOTICES_VERSION_KEY = 'notices:version'
+
+
+def _fresh_version():
+    # Seeded from the clock rather than 1, so a version key that gets evicted
+    # can never come back at a number whose entries are still cached.
+    return time.time_ns()
+
+
+def notices_version():
+    version = cache.get(NOTICES_VERSION_KEY)
+    if version is None:
+        cache.add(NOTICES_VERSION_KEY, _fresh_version(), None)
+        version = cache.get(NOTICES_VERSION_KEY)
+    return version
+
+
+def bump_notices_version():
+    try:
+        cache.incr(NOTICES_VERSION_KEY)
+    except ValueError:
+        cache.set(NOTICES_VERSION_KEY, _fresh_version(), None)
+
+
+def cached_notices(suffix, build):
+    """
+    Return ``(version, value)`` where ``value`` is ``build()`` cached under
+    the current notices version. Saving or deleting a Notice bumps the
+    version, so entries are never served stale; old ones simply expire.
+    """
+    version = notices_version()
+    digest = hashlib.md5(suffix.encode()).hexdigest()
+    key = f'notices:{version}:{digest}'
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, getattr(settings, 'NOTICES_CACHE_TIMEOUT', 60 * 60 * 24))
+    return version, value
+
+
+def cached_leaderboard(suffix, build):
+    """
+    ``build()`` cached for LEADERBOARD_CACHE_TIMEOUT seconds. Point changes
+    are frequent and a few seconds of lag in a ranking is harmless, so the
+    entries simply expire instead of being invalidated.
+    """
+    digest = hashlib.md5(suffix.encode()).hexdigest()
+    key = f'leaderboard:{digest}'
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, getattr(settings, 'LEADERBOARD_CACHE_TIMEOUT', 30))
+    return value
@@ -0,0 +1,49 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def compute_validators(queryset, field, *vary):
+    """
+    Build ``(etag, last_modified)`` for a list endpoint from one aggregate
+    query: the row count catches deletions, ``Max(field)`` catches inserts
+    and edits. ``vary`` folds in anything else the body depends on, such as
+    the query string or the requesting user.
+    """
+    stats = queryset.order_by().aggregate(count=Count('pk'), last=Max(field))
+    last_modified = stats['last']
+    return etag_for(stats['count'], last_modified, *vary), last_modified
+
+
+def etag_for(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _last_modified_timestamp(last_modified):
+    if last_modified is None:
+        return None
+    if hasattr(last_modified, 'timestamp'):
+        return int(last_modified.timestamp())
+    return None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    timestamp = _last_modified_timestamp(last_modified)
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 when the client's If-None-Match / If-Modified-Since still holds, else None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=_last_modified_timestamp(last_modified)
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('comment', 'like', 'notice')
+
+
+class LocalBackend:
+    """
+    In-process pub/sub. Publishers may run on any thread (sync views run in
+    a worker thread under ASGI); each subscriber is an asyncio.Queue fed
+    through its own event loop. A short history lets reconnecting clients
+    resume from ``Last-Event-ID``.
+
+    Events only reach subscribers in the same process. Multi-worker
+    deployments set EVENTS_BACKEND to DatabaseBackend, or to another
+    backend exposing the same ``publish``/``subscribe`` pair over a shared
+    transport.
+    """
+
+    def __init__(self, history=200, queue_size=100):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._next_id = 1
+        self._queue_size = queue_size
+
+    def publish(self, topic, data):
+        with self._lock:
+            event = {'id': self._next_id, 'topic': topic, 'data': data}
+            self._next_id += 1
+        self._dispatch(event)
+
+    def _dispatch(self, event):
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue, event):
+        # A client that stops reading loses its oldest events rather than
+        # holding memory for the whole process.
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, last_event_id=None):
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        self._offer(queue, event)
+            self._subscribers.add(entry)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+
+class DatabaseBackend(LocalBackend):
+    """
+    Pub/sub shared by every worker through the dorm Event table.
+    ``publish`` inserts a row. One poller thread per process reads new rows
+    every EVENTS_POLL_SECONDS and fans them out to that process's
+    subscribers. The row id is the event id, so a client can resume with
+    ``Last-Event-ID`` on any worker. The poller prunes rows older than
+    EVENTS_RETENTION_SECONDS.
+    """
+
+    def __init__(self, history=200, queue_size=100, poll_interval=None, retention=None):
+        super().__init__(history=history, queue_size=queue_size)
+        self._poll_interval = poll_interval or getattr(settings, 'EVENTS_POLL_SECONDS', 1)
+        self._retention = timedelta(seconds=retention or getattr(settings, 'EVENTS_RETENTION_SECONDS', 600))
+        self._last_id = None
+        self._pruned_at = 0
+
+    def publish(self, topic, data):
+        from .models import Event
+        Event.objects.create(topic=topic, data=data)
+
+    def _start(self):
+        from .models import Event
+        with self._lock:
+            if self._last_id is not None:
+                return
+            # Seed the replay history so reconnects work from the first poll.
+            recent = list(Event.objects.order_by('-id').values_list('id', 'topic', 'data')[:self._history.maxlen])
+            for pk, topic, data in reversed(recent):
+                self._history.append({'id': pk, 'topic': topic, 'data': data})
+            self._last_id = recent[0][0] if recent else 0
+        threading.Thread(target=self._run, name='events-poller', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self._poll_interval)
+            close_old_connections()
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception("Polling the event table failed.")
+
+    def poll(self):
+        """Dispatch rows newer than the last one seen; returns how many."""
+        from .models import Event
+        rows = list(
+            Event.objects.filter(id__gt=self._last_id).order_by('id').values_list('id', 'topic', 'data')[:500]
+        )
+        for pk, topic, data in rows:
+            self._dispatch({'id': pk, 'topic': topic, 'data': data})
+            self._last_id = pk
+        if time.monotonic() - self._pruned_at > 60:
+            self._pruned_at = time.monotonic()
+            Event.objects.filter(created_at__lt=timezone.now() - self._retention).delete()
+        return len(rows)
+
+    @asynccontextmanager
+    async def subscribe(self, last_event_id=None):
+        if self._last_id is None:
+            await sync_to_async(self._start)()
+        async with super().subscribe(last_event_id) as queue:
+            yield queue
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'EVENTS_BACKEND', 'dorm.events.LocalBackend')
+            _backend = import_string(path)()
+    return _backend
+
+
+def publish_on_commit(topic, build):
+    """
+    Publish ``build()`` on ``topic`` once the current transaction commits.
+    A None payload (e.g. the post was deleted meanwhile) is dropped.
+    """
+    def send():
+        data = build()
+        if data is not None:
+            get_backend().publish(topic, data)
+    transaction.on_commit(send)
+
+
+def format_event(event):
+    payload = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['topic']}\ndata: {payload}\n\n"
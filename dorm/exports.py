@@ -0,0 +1,124 @@
+import csv
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+
+from .models import Dorm, OutingApply
+
+DORM_COLUMNS = [
+    ('id', 'id'),
+    ('name', 'name'),
+    ('student_number', 'student_number'),
+    ('gender', 'gender'),
+    ('building_name', 'building_name'),
+    ('r_number', 'r_number'),
+    ('position', 'position'),
+    ('department', 'user__userprofile__department'),
+    ('phone_number', 'user__userprofile__phone_number'),
+    ('reward_point', 'user__userprofile__reward_point'),
+    ('penalty_point', 'user__userprofile__penalty_point'),
+]
+
+OUTING_COLUMNS = [
+    ('id', 'id'),
+    ('name', 'name'),
+    ('student_number', 'student_number'),
+    ('out_date', 'out_date'),
+    ('status', 'status'),
+    ('applied_at', 'applied_at'),
+    ('building_name', 'user__dorm__building_name'),
+    ('r_number', 'user__dorm__r_number'),
+]
+
+USER_COLUMNS = [
+    ('id', 'id'),
+    ('student_number', 'username'),
+    ('full_name', 'userprofile__full_name'),
+    ('department', 'userprofile__department'),
+    ('phone_number', 'userprofile__phone_number'),
+    ('reward_point', 'userprofile__reward_point'),
+    ('penalty_point', 'userprofile__penalty_point'),
+    ('building_name', 'dorm__building_name'),
+    ('r_number', 'dorm__r_number'),
+    ('position', 'dorm__position'),
+    ('date_joined', 'date_joined'),
+]
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back to the csv writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def iter_rows(queryset, fields, size=None):
+    """
+    Yield ``values_list(*fields)`` rows in id order, one keyset batch at a
+    time. MySQL drivers buffer a whole result set client-side, so a single
+    ``iterator()`` would still hold every row; seeking on id keeps each
+    round trip, and the process, at ``size`` rows.
+    """
+    size = size or chunk_size()
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', *fields)[:size])
+        for row in batch:
+            yield row[1:]
+        if len(batch) < size:
+            return
+        last_id = batch[-1][0]
+
+
+def stream_csv(filename, columns, queryset):
+    writer = csv.writer(Echo())
+
+    def lines():
+        # BOM so spreadsheet apps open Korean names as UTF-8.
+        yield '\ufeff' + writer.writerow([header for header, _ in columns])
+        for row in iter_rows(queryset, [field for _, field in columns]):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def dorm_applications(building=None, gender=None):
+    queryset = Dorm.objects.all()
+    if building:
+        queryset = queryset.filter(building_name=building)
+    if gender:
+        queryset = queryset.filter(gender=gender)
+    return queryset
+
+
+def outing_applications(date_from=None, date_to=None, status=None, building=None):
+    # Resolved through the user link, as the roster and status API do.
+    queryset = OutingApply.objects.all()
+    if date_from:
+        queryset = queryset.filter(out_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(out_date__lte=date_to)
+    if status:
+        queryset = queryset.filter(status=status)
+    if building:
+        queryset = queryset.filter(user__dorm__building_name=building)
+    return queryset
+
+
+def user_roster(date_from=None, date_to=None, building=None):
+    queryset = User.objects.filter(is_staff=False)
+    if date_from:
+        queryset = queryset.filter(date_joined__date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date_joined__date__lte=date_to)
+    if building:
+        queryset = queryset.filter(dorm__building_name=building)
+    return queryset
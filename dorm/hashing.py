@@ -0,0 +1,10 @@
+from django.utils.module_loading import import_string
+
+# Process-pool workers are spawned without Django set up, so this module
+# must not import models (or anything that does) at the top level.
+
+
+def hash_passwords(hasher_path, passwords):
+    """Runs in a worker process: PBKDF2 (or whichever hasher is default) is CPU-bound."""
+    hasher = import_string(hasher_path)()
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
@@ -0,0 +1,123 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = {'thumb': 320, 'medium': 960}
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+VARIANT_DIR = 'variants'
+
+_executor = None
+
+
+def variant_name(name, label, ext):
+    base, _ = os.path.splitext(name)
+    return f"{VARIANT_DIR}/{base}_{label}.{ext}"
+
+
+def _all_variant_names(name):
+    return [
+        (label, width, ext, variant_name(name, label, ext))
+        for label, width in VARIANT_WIDTHS.items()
+        for ext in VARIANT_FORMATS
+    ]
+
+
+def has_variants(name):
+    # Variants are written in a fixed order, so the last one marks the set as complete.
+    return default_storage.exists(_all_variant_names(name)[-1][3])
+
+
+def variant_urls(fieldfile):
+    """
+    Return ``{'thumb': {'webp': url, 'jpeg': url}, 'medium': {...}}`` for an
+    uploaded image, or None while the variants have not been generated yet.
+    """
+    if not fieldfile or not has_variants(fieldfile.name):
+        return None
+    urls = {}
+    for label, _, ext, name in _all_variant_names(fieldfile.name):
+        urls.setdefault(label, {})[ext] = default_storage.url(name)
+    return urls
+
+
+def render_variants(src_path, targets, quality=82):
+    """
+    Runs in a worker process: decode ``src_path`` once and write each
+    ``(width, ext, dest_path)`` target. Images narrower than the target are
+    re-encoded but never upscaled.
+    """
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)
+        written = []
+        for width, ext, dest_path in targets:
+            variant = img
+            if img.width > width:
+                height = round(img.height * width / img.width)
+                variant = img.resize((width, height), Image.LANCZOS)
+            fmt = VARIANT_FORMATS[ext]
+            if fmt == 'JPEG' and variant.mode not in ('RGB', 'L'):
+                variant = variant.convert('RGB')
+            elif variant.mode not in ('RGB', 'RGBA', 'L'):
+                variant = variant.convert('RGBA')
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            tmp_path = f"{dest_path}.tmp"
+            variant.save(tmp_path, fmt, quality=quality, optimize=True)
+            os.replace(tmp_path, dest_path)
+            written.append(dest_path)
+    return written
+
+
+def _targets(name):
+    return [
+        (width, ext, default_storage.path(dest))
+        for _, width, ext, dest in _all_variant_names(name)
+    ]
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+    return _executor
+
+
+def _log_failure(name):
+    def callback(future):
+        exc = future.exception()
+        if exc is not None:
+            logger.warning("Image variant generation failed for %s: %s", name, exc)
+    return callback
+
+
+def generate_variants(name, force=False, wait=False):
+    """
+    Queue variant generation for the stored image ``name`` on the process
+    pool. With IMAGE_VARIANT_WORKERS = 0 the work runs inline instead.
+    """
+    if not name or (not force and has_variants(name)):
+        return None
+    src_path = default_storage.path(name)
+    targets = _targets(name)
+
+    if getattr(settings, 'IMAGE_VARIANT_WORKERS', 2) == 0:
+        return render_variants(src_path, targets)
+
+    global _executor
+    try:
+        future = get_executor().submit(render_variants, src_path, targets)
+    except BrokenProcessPool:
+        _executor = None
+        future = get_executor().submit(render_variants, src_path, targets)
+    future.add_done_callback(_log_failure(name))
+    if wait:
+        return future.result()
+    return future
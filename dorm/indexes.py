@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import Index
+
+from .models import Notice, Post
+from .search import ensure_index
+
+# auth_user belongs to django.contrib.auth, so this app cannot declare the
+# index in a model Meta. It is created after every migrate instead.
+USER_EMAIL_INDEX = Index(fields=['email'], name='auth_user_email_idx')
+
+
+def _exists(connection, model, name):
+    with connection.cursor() as cursor:
+        return name in connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+
+def ensure_user_email_index(using='default'):
+    connection = connections[using]
+    if _exists(connection, User, USER_EMAIL_INDEX.name):
+        return False
+    with connection.schema_editor() as editor:
+        editor.add_index(User, USER_EMAIL_INDEX)
+    return True
+
+
+def drop_user_email_index(using='default'):
+    connection = connections[using]
+    if not _exists(connection, User, USER_EMAIL_INDEX.name):
+        return False
+    with connection.schema_editor() as editor:
+        editor.remove_index(User, USER_EMAIL_INDEX)
+    return True
+
+
+def create_user_email_index(sender, using='default', **kwargs):
+    """post_migrate receiver."""
+    ensure_user_email_index(using)
+
+
+def create_search_indexes(sender, using='default', **kwargs):
+    """post_migrate receiver: the FULLTEXT indexes on MySQL, the FTS5 tables on SQLite."""
+    for model in (Post, Notice):
+        ensure_index(model, using)
@@ -0,0 +1,35 @@
+from .models import UserProfile
+
+FIELDS = (
+    'user__username', 'full_name', 'department', 'reward_point', 'penalty_point',
+    'net_point', 'user__dorm__building_name', 'user__dorm__r_number',
+)
+
+
+def leaderboard(department=None, building=None, page=1, size=20):
+    """
+    Residents ranked by net points (ties by profile id), read straight off
+    the net_point index. Returns ``(entries, has_next)``.
+    """
+    profiles = UserProfile.objects.filter(user__is_staff=False)
+    if department:
+        profiles = profiles.filter(department=department)
+    if building:
+        profiles = profiles.filter(user__dorm__building_name=building)
+    offset = (page - 1) * size
+    rows = list(profiles.order_by('-net_point', 'id').values_list(*FIELDS)[offset:offset + size + 1])
+    entries = [
+        {
+            'rank': offset + n + 1,
+            'student_number': username,
+            'full_name': full_name,
+            'department': dept,
+            'reward_point': reward,
+            'penalty_point': penalty,
+            'net_point': net,
+            'building_name': building_name or '',
+            'r_number': r_number or None,
+        }
+        for n, (username, full_name, dept, reward, penalty, net, building_name, r_number) in enumerate(rows[:size])
+    ]
+    return entries, len(rows) > size
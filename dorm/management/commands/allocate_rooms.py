@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dorm.allocation import PRIORITIES, AllocationError, allocate_rooms
+from dorm.occupancy import BedUnavailable
+
+
+class Command(BaseCommand):
+    help = "Assign beds to every unassigned Dorm application from a JSON list of building definitions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('buildings', help="Path to a JSON file with the building definitions.")
+        parser.add_argument('--priority', default='net_points', choices=list(PRIORITIES))
+        parser.add_argument('--dry-run', action='store_true', help="Report the allocation without saving it.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['buildings'], encoding='utf-8') as f:
+                buildings = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise CommandError(f"Could not read {options['buildings']}: {e}")
+
+        try:
+            result = allocate_rooms(buildings, priority=options['priority'], dry_run=options['dry_run'])
+        except (AllocationError, BedUnavailable) as e:
+            raise CommandError(str(e))
+
+        prefix = "[dry run] " if result['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}Assigned {result['assigned']} applicant(s)."))
+        for gender, count in result['unassigned'].items():
+            self.stdout.write(self.style.WARNING(f"{prefix}{count} {gender} applicant(s) left without a bed."))
+        for gender, count in result['free_beds'].items():
+            self.stdout.write(f"{prefix}{count} {gender} bed(s) still free.")
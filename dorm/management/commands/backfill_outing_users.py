@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from dorm.models import OutingApply
+
+
+class Command(BaseCommand):
+    help = (
+        "Link existing outing applications to their User through the student number, in id batches. "
+        "Safe to re-run; rows without a matching account stay unlinked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        owner = User.objects.filter(username=OuterRef('student_number')).values('id')[:1]
+        pending = OutingApply.objects.filter(user__isnull=True).order_by('id')
+        scanned = 0
+        last_id = 0
+        while True:
+            ids = list(pending.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            OutingApply.objects.filter(id__in=ids).update(user=Subquery(owner))
+            scanned += len(ids)
+            last_id = ids[-1]
+        unlinked = OutingApply.objects.filter(user__isnull=True, id__lte=last_id).count()
+        self.stdout.write(self.style.SUCCESS(f"Linked {scanned - unlinked} of {scanned} application(s)."))
+        if unlinked:
+            self.stdout.write(self.style.WARNING(f"{unlinked} application(s) have no matching account."))
@@ -0,0 +1,256 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from dorm.indexes import drop_user_email_index, ensure_user_email_index
+from dorm.models import Comment, Dorm, Inquiry, Notice, OutingApply, Post, UserProfile
+
+PREFIX = 'bench'
+STUDENT_PREFIX = 'bn'
+BUILDINGS = ['A동', 'B동', 'C동', 'D동']
+INDEXED_MODELS = [Dorm, OutingApply, Inquiry, Post, Comment, Notice]
+
+
+def hot_queries(db):
+    """The ORM queries behind dorm/views.py and web/views.py, one sample each."""
+    user = User.objects.using(db).filter(username=f'{PREFIX}{1:06d}').first()
+    post = Post.objects.using(db).filter(author__username__startswith=PREFIX).first()
+    since = timezone.now() - timedelta(days=3)
+    outings = OutingApply.objects.using(db)
+    return [
+        ('outing status (student)', outings.filter(user=user).order_by('-applied_at')),
+        ('outing status (staff)', outings.order_by('-applied_at')[:50]),
+        ('outings by status', outings.filter(status='pending', out_date__gte=date.today()).order_by('out_date')[:50]),
+        ('dorms by gender/building', Dorm.objects.using(db).filter(gender='male', building_name=BUILDINGS[0])),
+        ('unassigned applicants', Dorm.objects.using(db).filter(building_name='')),
+        ('room occupants', Dorm.objects.using(db).filter(building_name=BUILDINGS[0], r_number=201)),
+        ('post feed', Post.objects.using(db).order_by('-created_at', '-id')[:21]),
+        ('post comments', Comment.objects.using(db).filter(post=post).order_by('created_at', 'id')[:51]),
+        ('my inquiries', Inquiry.objects.using(db).filter(user=user).order_by('-created_at')),
+        ('signup email check', User.objects.using(db).filter(email=f'{PREFIX}{1:06d}@example.com')),
+        ('sync posts', Post.objects.using(db).filter(updated_at__gt=since).order_by('updated_at', 'id')[:200]),
+        ('sync outings', outings.filter(updated_at__gt=since).order_by('updated_at', 'id')[:200]),
+    ]
+
+
+def is_full_scan(vendor, plan):
+    if vendor == 'sqlite':
+        # Plan lines read "<id> <parent> <notused> SCAN <table> [USING ... INDEX ...]".
+        return any(' SCAN ' in f' {line} ' and 'USING' not in line for line in plan.splitlines())
+    if vendor == 'mysql':
+        # Tabular EXPLAIN rows come back space-joined; the access type column reads ALL.
+        return any(' ALL ' in f' {line} ' for line in plan.splitlines())
+    if vendor == 'postgresql':
+        return 'Seq Scan' in plan
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed realistic data and print EXPLAIN plans and timings for the hot queries. "
+        "--compare first drops the dorm indexes to show the plans without them. Point --database at a "
+        "scratch database: the seeded rows are bulk-deleted afterwards by username prefix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', required=True, help="Alias of a scratch database from DATABASES.")
+        parser.add_argument(
+            '--allow-default', action='store_true',
+            help="Permit --database default, which is the application's live database.",
+        )
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per query; the fastest is reported.")
+        parser.add_argument('--compare', action='store_true', help="Also measure with the indexes dropped.")
+        parser.add_argument('--keep', action='store_true', help="Leave the seeded rows in place.")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every EXPLAIN plan in full.")
+
+    def handle(self, *args, **options):
+        db = options['database']
+        if db not in connections.settings:
+            raise CommandError(f"Unknown database alias {db!r}.")
+        if db == 'default' and not options['allow_default']:
+            raise CommandError(
+                "Refusing to seed, drop indexes on and bulk-delete from the default database. "
+                "Configure a scratch alias, or pass --allow-default if default really is one."
+            )
+        connection = connections[db]
+        if not User.objects.using(db).filter(username__startswith=PREFIX).exists():
+            self.seed(db, options['students'])
+
+        try:
+            if options['compare']:
+                self.drop_indexes(connection, db)
+                before = self.measure(connection, db, options)
+                self.create_indexes(connection, db)
+            else:
+                before = None
+            after = self.measure(connection, db, options)
+            self.report(before, after)
+        finally:
+            if options['compare']:
+                self.create_indexes(connection, db)
+            if not options['keep']:
+                self.cleanup(db)
+
+    def seed(self, db, students):
+        self.stdout.write(f"Seeding {students} students...")
+        rng = random.Random(42)
+        now = timezone.now()
+        with transaction.atomic(using=db):
+            User.objects.using(db).bulk_create(
+                [
+                    User(username=f'{PREFIX}{i:06d}', email=f'{PREFIX}{i:06d}@example.com', password='!')
+                    for i in range(students)
+                ],
+                batch_size=1000,
+            )
+            users = list(User.objects.using(db).filter(username__startswith=PREFIX).values_list('id', flat=True))
+            UserProfile.objects.using(db).bulk_create(
+                [UserProfile(user_id=uid, full_name=f'학생{n}') for n, uid in enumerate(users)],
+                batch_size=1000, ignore_conflicts=True,
+            )
+            Dorm.objects.using(db).bulk_create(
+                [
+                    Dorm(
+                        user_id=uid, name=f'학생{n}', student_number=f'{STUDENT_PREFIX}{n:08d}',
+                        gender='male' if n % 2 else 'female',
+                        building_name='' if n % 10 == 0 else BUILDINGS[n % len(BUILDINGS)],
+                        r_number=0 if n % 10 == 0 else 200 + (n // 8) % 40 + 100 * (n % 3),
+                        position=0 if n % 10 == 0 else n % 2 + 1,
+                    )
+                    for n, uid in enumerate(users)
+                ],
+                batch_size=1000,
+            )
+            OutingApply.objects.using(db).bulk_create(
+                [
+                    OutingApply(
+                        user_id=users[n], name=f'학생{n}', student_number=f'{STUDENT_PREFIX}{n:08d}',
+                        out_date=date.today() + timedelta(days=rng.randint(-60, 30)),
+                        status=rng.choice(['pending', 'approved', 'approved', 'rejected']),
+                    )
+                    for n in range(len(users)) for _ in range(4)
+                ],
+                batch_size=1000,
+            )
+            Post.objects.using(db).bulk_create(
+                [
+                    Post(author_id=rng.choice(users), title=f'게시글 {n}', content='내용 ' * 20)
+                    for n in range(students)
+                ],
+                batch_size=1000,
+            )
+            posts = list(
+                Post.objects.using(db).filter(author__username__startswith=PREFIX).values_list('id', flat=True)
+            )
+            Comment.objects.using(db).bulk_create(
+                [
+                    Comment(post_id=rng.choice(posts), author_id=rng.choice(users), content='댓글')
+                    for _ in range(students * 5)
+                ],
+                batch_size=1000,
+            )
+            Inquiry.objects.using(db).bulk_create(
+                [Inquiry(user_id=uid, title='문의', content='내용') for uid in users],
+                batch_size=1000,
+            )
+        # Spread timestamps so range and ordering queries see realistic selectivity.
+        seeded = (
+            (Post, 'created_at', Post.objects.filter(author__username__startswith=PREFIX)),
+            (Comment, 'created_at', Comment.objects.filter(author__username__startswith=PREFIX)),
+            (OutingApply, 'applied_at', OutingApply.objects.filter(student_number__startswith=STUDENT_PREFIX)),
+        )
+        for model, field, queryset in seeded:
+            objs = [
+                model(pk=pk, **{field: now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))})
+                for pk in queryset.using(db).values_list('pk', flat=True)
+            ]
+            model.objects.using(db).bulk_update(objs, [field], batch_size=1000)
+        for model in INDEXED_MODELS + [User]:
+            self.analyze(connections[db], model)
+
+    def analyze(self, connection, model):
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute(f"ANALYZE {table}")
+            elif connection.vendor == 'mysql':
+                cursor.execute(f"ANALYZE TABLE {table}")
+
+    def drop_indexes(self, connection, db):
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+        drop_user_email_index(db)
+
+    def create_indexes(self, connection, db):
+        with connection.cursor() as cursor:
+            existing = {
+                model: set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+                for model in INDEXED_MODELS
+            }
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if index.name not in existing[model]:
+                        editor.add_index(model, index)
+        ensure_user_email_index(db)
+        for model in INDEXED_MODELS + [User]:
+            self.analyze(connection, model)
+
+    def measure(self, connection, db, options):
+        results = {}
+        for label, queryset in hot_queries(db):
+            plan = queryset.explain()
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+            results[label] = (plan, min(timings) * 1000, is_full_scan(connection.vendor, plan))
+            if options['verbose_plans']:
+                self.stdout.write(f"-- {label}\n{plan}\n")
+        return results
+
+    def report(self, before, after):
+        self.stdout.write(f"{'query':<28}{'before ms':>12}{'after ms':>12}  plan")
+        scans = []
+        for label, (plan, ms, full_scan) in after.items():
+            was = f"{before[label][1]:.2f}" if before else '-'
+            if before and before[label][2]:
+                was += '*'
+            self.stdout.write(f"{label:<28}{was:>12}{ms:>12.2f}  {plan.splitlines()[0].strip()}")
+            if full_scan:
+                scans.append(label)
+        if before:
+            self.stdout.write("* full scan without the indexes")
+        if scans:
+            self.stdout.write(self.style.WARNING(f"Full scans remain: {', '.join(scans)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No hot query does a full table scan."))
+
+    def cleanup(self, db):
+        # Raw deletes in foreign-key order: the seeded rows never went through
+        # the save signals, so they must not fire the delete ones (tombstones,
+        # search index, counters) on the way out either.
+        seeded = [
+            Comment.objects.filter(author__username__startswith=PREFIX),
+            Post.objects.filter(author__username__startswith=PREFIX),
+            Inquiry.objects.filter(user__username__startswith=PREFIX),
+            Dorm.objects.filter(student_number__startswith=STUDENT_PREFIX),
+            UserProfile.objects.filter(user__username__startswith=PREFIX),
+            OutingApply.objects.filter(student_number__startswith=STUDENT_PREFIX),
+            User.objects.filter(username__startswith=PREFIX),
+        ]
+        with transaction.atomic(using=db):
+            for queryset in seeded:
+                model = queryset.model
+                ids = list(queryset.using(db).values_list('pk', flat=True))
+                for start in range(0, len(ids), 1000):
+                    model.objects.using(db).filter(pk__in=ids[start:start + 1000])._raw_delete(db)
@@ -0,0 +1,50 @@
+from concurrent.futures import Future
+
+from django.core.management.base import BaseCommand
+
+from dorm.images import generate_variants
+from dorm.models import Notice, Post
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnail and medium WebP/JPEG variants for Post and Notice images already in MEDIA_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate variants that already exist.")
+
+    def handle(self, *args, **options):
+        names = []
+        for model in (Post, Notice):
+            names.extend(
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .values_list('image', flat=True)
+                .iterator(chunk_size=500)
+            )
+
+        pending = {}
+        done = skipped = failed = 0
+        for name in names:
+            try:
+                result = generate_variants(name, force=options['force'])
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{name}: {exc}")
+                continue
+            if result is None:
+                skipped += 1
+            elif isinstance(result, Future):
+                pending[name] = result
+            else:
+                done += 1
+
+        for name, future in pending.items():
+            try:
+                future.result()
+                done += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{name}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated variants for {done} image(s), skipped {skipped}, failed {failed}."
+        ))
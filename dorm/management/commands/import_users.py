@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dorm.provisioning import ProvisioningError, provision_users, read_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Create student accounts from a CSV with columns username, password, email, full_name "
+        "and optionally department, phone_number. Existing usernames are skipped, so it is safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv', help="Path to the CSV file.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report without creating anything.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv'], 'rb') as f:
+                rows = read_csv(f.read())
+        except OSError as e:
+            raise CommandError(f"Could not read {options['csv']}: {e}")
+        except ProvisioningError as e:
+            raise CommandError(str(e))
+
+        result = provision_users(rows, batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        prefix = "[dry run] " if result['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}Created {result['created']} user(s)."))
+        if result['skipped']:
+            self.stdout.write(f"{prefix}{result['skipped']} username(s) already existed and were skipped.")
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"line {error['line']} ({error['username']}): {error['error']}"))
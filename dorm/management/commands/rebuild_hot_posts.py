@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from dorm.models import Post, PostScore
+from dorm.ranking import hot_score, hot_window
+
+
+class Command(BaseCommand):
+    help = "Recompute the hot-post ranking for every post inside HOT_POSTS_WINDOW_DAYS. Run periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - hot_window()
+        rows = (
+            Post.objects.filter(created_at__gte=since)
+            .filter(Q(like_count__gt=0) | Q(comment_count__gt=0))
+            .values_list('id', 'like_count', 'comment_count', 'created_at')
+        )
+
+        scores = [
+            PostScore(post_id=pk, score=hot_score(likes, comments, created_at, now))
+            for pk, likes, comments, created_at in rows.iterator(chunk_size=options['batch_size'])
+        ]
+
+        with transaction.atomic():
+            PostScore.objects.all().delete()
+            PostScore.objects.bulk_create(scores, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Ranked {len(scores)} post(s) since {since:%Y-%m-%d %H:%M}."))
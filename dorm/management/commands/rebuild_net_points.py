@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from dorm.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored net_point (reward_point - penalty_point) of every profile."
+
+    def handle(self, *args, **options):
+        stale = UserProfile.objects.exclude(net_point=F('reward_point') - F('penalty_point'))
+        updated = stale.update(net_point=F('reward_point') - F('penalty_point'))
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} profile(s)."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dorm.models import OutingApply, OutingRollup
+
+
+class Command(BaseCommand):
+    help = "Recount the per-date outing rollups from scratch, e.g. after the backfill or room moves."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Dates recounted per query.")
+
+    def handle(self, *args, **options):
+        dates = list(OutingApply.objects.order_by('out_date').values_list('out_date', flat=True).distinct())
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            OutingRollup.objects.exclude(date__in=dates).delete()
+            for start in range(0, len(dates), batch_size):
+                OutingRollup.refresh(dates[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Recounted {len(dates)} date(s)."))
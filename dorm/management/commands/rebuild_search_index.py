@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dorm.models import Notice, Post
+from dorm.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Create the full-text index for posts and notices and repopulate it from the tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None, help="Database alias (defaults to the router's choice).")
+
+    def handle(self, *args, **options):
+        for model in (Post, Notice):
+            count = rebuild_index(model, using=options['database'])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {count} row(s) indexed.")
+        self.stdout.write(self.style.SUCCESS("Search index ready."))
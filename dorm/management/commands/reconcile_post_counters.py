@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from dorm.models import Comment, Like, Post
+
+
+def _count_subquery(model):
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(c=Count('id'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.like_count and Post.comment_count from the Like and Comment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted posts without writing.")
+
+    def handle(self, *args, **options):
+        drifted = (
+            Post.objects
+            .annotate(real_likes=_count_subquery(Like), real_comments=_count_subquery(Comment))
+            .filter(~Q(like_count=F('real_likes')) | ~Q(comment_count=F('real_comments')))
+        )
+        drifted_ids = list(drifted.values_list('id', flat=True))
+
+        if options['dry_run'] or not drifted_ids:
+            self.stdout.write(f"{len(drifted_ids)} post(s) out of sync.")
+            return
+
+        with transaction.atomic():
+            updated = Post.objects.filter(id__in=drifted_ids).update(
+                like_count=_count_subquery(Like),
+                comment_count=_count_subquery(Comment),
+            )
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {updated} post(s)."))
@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dorm.allocation import AllocationError, parse_buildings
+from dorm.models import Bed, Dorm
+from dorm.occupancy import bed_key, create_beds, floor_of
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild bed occupancy from current Dorm assignments. Pass a buildings JSON file "
+        "(same format as allocate_rooms) to also create the empty beds that vacancies are read from."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('buildings', nargs='?', help="Path to a JSON file with the building definitions.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['buildings']:
+            try:
+                with open(options['buildings'], encoding='utf-8') as f:
+                    buildings = parse_buildings(json.load(f))
+            except (OSError, json.JSONDecodeError, AllocationError) as e:
+                raise CommandError(f"Could not read {options['buildings']}: {e}")
+            self.stdout.write(f"{create_beds(buildings)} bed(s) defined.")
+
+        claims = {}
+        duplicates = []
+        assigned = Dorm.objects.exclude(building_name='').order_by('id').only(
+            'id', 'gender', 'building_name', 'r_number', 'position'
+        )
+        for dorm in assigned.iterator(chunk_size=batch_size):
+            key = bed_key(dorm)
+            if key is None:
+                continue
+            if key in claims:
+                duplicates.append((dorm.id, key))
+            else:
+                claims[key] = dorm
+
+        with transaction.atomic():
+            Bed.objects.bulk_create(
+                [
+                    Bed(building_name=b, r_number=r, position=p, floor=floor_of(r), gender=dorm.gender)
+                    for (b, r, p), dorm in claims.items()
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            Bed.objects.exclude(occupant=None).update(occupant=None)
+            beds = []
+            for bed in Bed.objects.select_for_update().iterator(chunk_size=batch_size):
+                dorm = claims.get((bed.building_name, bed.r_number, bed.position))
+                if dorm is not None:
+                    bed.occupant_id = dorm.id
+                    beds.append(bed)
+            Bed.objects.bulk_update(beds, ['occupant'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(beds)} bed(s) occupied."))
+        for dorm_id, (building_name, r_number, position) in duplicates:
+            self.stdout.write(self.style.WARNING(
+                f"Dorm {dorm_id} shares {building_name} {r_number}-{position} with an earlier assignment; left off the bed."
+            ))
@@ -1,7 +1,20 @@
-from django.db import models
+import threading
+from concurrent.futures import Future
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_notices_version
+from .events import publish_on_commit
+from .images import generate_variants, variant_urls
+from .ranking import hot_score, hot_window
+from .search import index_object, unindex_object
 
 
 def post_image_path(instance, filename):
@@ -15,10 +28,52 @@ class UserProfile(models.Model):
     phone_number = models.CharField(max_length=20, blank=True, default="")  
     reward_point = models.IntegerField(default=0)
     penalty_point = models.IntegerField(default=0)
+    # reward_point - penalty_point, stored so the leaderboard sorts on an index.
+    net_point = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-net_point', 'id'], name='profile_net_point_idx'),
+            models.Index(fields=['department', '-net_point', 'id'], name='profile_dept_net_point_idx'),
+            models.Index(fields=['full_name'], name='profile_full_name_idx'),
+            models.Index(fields=['phone_number'], name='profile_phone_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name or self.user.username} ({self.department})"
 
+    def save(self, *args, **kwargs):
+        self.net_point = self.reward_point - self.penalty_point
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'reward_point', 'penalty_point'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'net_point'}
+        super().save(*args, **kwargs)
+
+
+class PointTransaction(models.Model):
+    """Append-only record of every reward/penalty award; balances live on UserProfile."""
+    POINT_TYPE_CHOICES = [
+        ('reward', 'Reward'),
+        ('penalty', 'Penalty'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='point_transactions')
+    point_type = models.CharField(max_length=7, choices=POINT_TYPE_CHOICES)
+    points = models.IntegerField()
+    reason = models.CharField(max_length=200, blank=True, default="")
+    awarded_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='points_awarded'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='point_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.point_type} {self.points:+d}"
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -41,10 +96,39 @@ class Dorm(models.Model):
     )
     is_available = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # allocation, exports and the vacancy backfill filter on these
+            models.Index(fields=['gender', 'building_name'], name='dorm_gender_building_idx'),
+            models.Index(fields=['building_name', 'r_number', 'position'], name='dorm_room_idx'),
+            models.Index(fields=['name'], name='dorm_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.student_number} - {self.gender}"
 
 
+class Bed(models.Model):
+    """One physical bed. ``occupant`` mirrors the Dorm assignment pointing at it."""
+    building_name = models.CharField(max_length=50)
+    r_number = models.IntegerField()
+    position = models.IntegerField()
+    floor = models.IntegerField()
+    gender = models.CharField(max_length=6, choices=Dorm.GENDER_CHOICES)
+    occupant = models.OneToOneField(Dorm, on_delete=models.SET_NULL, null=True, blank=True, related_name='bed')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['building_name', 'r_number', 'position'], name='unique_bed'),
+        ]
+        indexes = [
+            models.Index(fields=['occupant', 'gender', 'building_name', 'floor'], name='bed_vacancy_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.building_name} {self.r_number}-{self.position}"
+
+
 class OutingApply(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Standby'),
@@ -52,19 +136,100 @@ class OutingApply(models.Model):
         ('rejected', 'not approve'),
     ]
 
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='outing_applies'
+    )
     name = models.CharField(max_length=20)
     student_number = models.CharField(max_length=10)
     out_date = models.DateField()
     applied_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(
         max_length=10,
         choices=STATUS_CHOICES,
         default='pending'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-applied_at'], name='outing_user_applied_idx'),
+            models.Index(fields=['student_number', '-applied_at'], name='outing_student_applied_idx'),
+            models.Index(fields=['applied_at'], name='outing_applied_idx'),
+            models.Index(fields=['out_date', 'status'], name='outing_date_status_idx'),
+            models.Index(fields=['updated_at', 'id'], name='outing_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.student_number} - {self.out_date} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        # Creation paths normally pass the user; anything else (admin, shell)
+        # is linked through the student number once, on insert.
+        if self.user_id is None and self._state.adding and self.student_number:
+            self.user = User.objects.filter(username=self.student_number).first()
+        super().save(*args, **kwargs)
+
+
+class OutingRollup(models.Model):
+    """Per-date, per-building outing counts for the curfew roster."""
+    date = models.DateField()
+    building_name = models.CharField(max_length=50, blank=True, default="")
+    approved = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'building_name'], name='unique_outing_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.building_name or '-'}: {self.approved}/{self.pending}/{self.rejected}"
+
+    @classmethod
+    def refresh(cls, dates):
+        """
+        Recount ``dates`` from OutingApply, grouped by the applicant's current
+        building (blank when unassigned or unlinked).
+        """
+        dates = {d for d in dates if d is not None}
+        if not dates:
+            return
+        counts = (
+            OutingApply.objects.filter(out_date__in=dates)
+            .annotate(building=Coalesce(F('user__dorm__building_name'), Value('')))
+            .values('out_date', 'building')
+            .annotate(
+                approved=Count('id', filter=Q(status='approved')),
+                pending=Count('id', filter=Q(status='pending')),
+                rejected=Count('id', filter=Q(status='rejected')),
+            )
+            .order_by()
+        )
+        rows = [
+            cls(
+                date=row['out_date'], building_name=row['building'],
+                approved=row['approved'], pending=row['pending'], rejected=row['rejected'],
+            )
+            for row in counts
+        ]
+        # Replace the dates wholesale: MySQL has no ON CONFLICT target, so an
+        # upsert is not portable. A concurrent refresh of the same date
+        # inserts the same counts, hence ignore_conflicts.
+        with transaction.atomic():
+            cls.objects.filter(date__in=dates).delete()
+            cls.objects.bulk_create(rows, ignore_conflicts=True)
+
+    @classmethod
+    def refresh_for_dorms(cls, dorm_ids):
+        """Recount every date the occupants of ``dorm_ids`` applied for; run it after a room change."""
+        dates = (
+            OutingApply.objects.filter(user__dorm__in=list(dorm_ids))
+            .values_list('out_date', flat=True).distinct()
+        )
+        cls.refresh(set(dates))
+
 
 class Inquiry(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -72,6 +237,12 @@ class Inquiry(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='inquiry_user_created_idx'),
+            models.Index(fields=['created_at'], name='inquiry_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.user.username})"
 
@@ -81,6 +252,12 @@ class InquiryAnswer(models.Model):
     admin = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inquiry_answers')
     answer = models.TextField()
     answered_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='answer_updated_idx'),
+        ]
 
     def __str__(self):
         return f"answer ({self.inquiry.title})"
@@ -93,10 +270,23 @@ class Post(models.Model):
     image = models.ImageField(upload_to=post_image_path, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    like_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # keyset feed (created_at, id) and /api/sync/ (updated_at, id)
+            models.Index(fields=['created_at', 'id'], name='post_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='post_updated_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.author.username}] {self.title}"
 
+    @property
+    def image_variants(self):
+        return variant_urls(self.image)
+
 
 class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -116,10 +306,62 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='comment_created_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.author.username}] comment on {self.post.id}"
 
 
+class PostScore(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='hot_score')
+    score = models.FloatField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Post({self.post_id}) score {self.score:.4f}"
+
+    @classmethod
+    def refresh(cls, post_id, create=True):
+        post = Post.objects.filter(pk=post_id).values('like_count', 'comment_count', 'created_at').first()
+        if post is None:
+            return
+        score = hot_score(post['like_count'], post['comment_count'], post['created_at'])
+        if create and post['created_at'] >= timezone.now() - hot_window():
+            cls.objects.update_or_create(post_id=post_id, defaults={'score': score})
+        else:
+            cls.objects.filter(post_id=post_id).update(score=score)
+
+
+@receiver(post_save, sender=Like)
+def increment_like_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(like_count=F('like_count') + 1, updated_at=timezone.now())
+        PostScore.refresh(instance.post_id)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_like_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(like_count=F('like_count') - 1, updated_at=timezone.now())
+    PostScore.refresh(instance.post_id, create=False)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') + 1, updated_at=timezone.now())
+        PostScore.refresh(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') - 1, updated_at=timezone.now())
+    PostScore.refresh(instance.post_id, create=False)
+
+
 class Notice(models.Model):
     title   = models.CharField(max_length=200)
     content = models.TextField()
@@ -129,6 +371,184 @@ class Notice(models.Model):
         null=True
     )
     date    = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='notice_date_idx'),
+            models.Index(fields=['updated_at', 'id'], name='notice_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @property
+    def image_variants(self):
+        return variant_urls(self.image)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Notice)
+def queue_image_variants(sender, instance, **kwargs):
+    if not instance.image:
+        return
+    name = instance.image.name
+    pk = instance.pk
+    origin = None
+
+    def refresh():
+        # Cached notice payloads embed image_variants, so refresh them once the
+        # files exist; posts get a new updated_at so feed ETags change too.
+        if sender is Notice:
+            bump_notices_version()
+        else:
+            Post.objects.filter(pk=pk).update(updated_at=timezone.now())
+
+    def done(future):
+        if future.exception() is None:
+            try:
+                refresh()
+            finally:
+                # The pool's callback thread is never cleaned up by Django; a
+                # future that was already done runs here on the request thread.
+                if threading.get_ident() != origin:
+                    connection.close()
+
+    def queue():
+        nonlocal origin
+        origin = threading.get_ident()
+        result = generate_variants(name)
+        if isinstance(result, Future):
+            result.add_done_callback(done)
+        elif result is not None:
+            refresh()
+    transaction.on_commit(queue)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Notice)
+def update_search_index(sender, instance, using, **kwargs):
+    index_object(instance, using=using)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Notice)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    unindex_object(instance, using=using)
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_event(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    def build():
+        comment_count = Post.objects.filter(pk=instance.post_id).values_list('comment_count', flat=True).first()
+        if comment_count is None:
+            return None
+        return {
+            'post_id': instance.post_id,
+            'comment': {
+                'id': instance.id,
+                'author_id': instance.author_id,
+                'anon_author': f"{instance.author_id % 10000:04d}",
+                'content': instance.content,
+                'created_at': instance.created_at.isoformat(),
+            },
+            'comment_count': comment_count,
+        }
+    publish_on_commit('comment', build)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def publish_like_event(sender, instance, created=True, **kwargs):
+    if not created:
+        return
+
+    def build():
+        like_count = Post.objects.filter(pk=instance.post_id).values_list('like_count', flat=True).first()
+        if like_count is None:
+            return None
+        return {'post_id': instance.post_id, 'like_count': like_count}
+    publish_on_commit('like', build)
+
+
+@receiver(post_save, sender=Notice)
+def publish_notice_event(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit('notice', lambda: {
+            'notice': {
+                'id': instance.id,
+                'title': instance.title,
+                'date': instance.date.isoformat(),
+            },
+        })
+
+
+@receiver(post_save, sender=Notice)
+@receiver(post_delete, sender=Notice)
+def invalidate_notice_cache(sender, instance, **kwargs):
+    transaction.on_commit(bump_notices_version)
+
+
+class Tombstone(models.Model):
+    """Marks a deleted row so /api/sync/ can tell clients to drop it."""
+    KIND_CHOICES = [
+        ('notice', 'Notice'),
+        ('post', 'Post'),
+        ('comment', 'Comment'),
+        ('outing', 'Outing application'),
+        ('inquiry_answer', 'Inquiry answer'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind}({self.object_id}) deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class Event(models.Model):
+    """Outbox read by dorm.events.DatabaseBackend; pruned after EVENTS_RETENTION_SECONDS."""
+    topic = models.CharField(max_length=20)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
+
+
+@receiver(post_delete, sender=Notice)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def record_public_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(kind=sender._meta.model_name, object_id=instance.pk)
+
+
+@receiver(post_init, sender=OutingApply)
+def remember_out_date(sender, instance, **kwargs):
+    # __dict__ so a deferred out_date is not fetched just for this.
+    instance._rollup_date = instance.__dict__.get('out_date')
+
+
+@receiver(post_save, sender=OutingApply)
+@receiver(post_delete, sender=OutingApply)
+def refresh_outing_rollup(sender, instance, **kwargs):
+    # Recount after commit so the rollup reads every committed change.
+    dates = {instance.out_date, getattr(instance, '_rollup_date', None)}
+    instance._rollup_date = instance.out_date
+    transaction.on_commit(lambda: OutingRollup.refresh(dates))
+
+
+@receiver(post_delete, sender=OutingApply)
+def record_outing_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(kind='outing', object_id=instance.pk, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=InquiryAnswer)
+def record_inquiry_answer_tombstone(sender, instance, **kwargs):
+    user_id = Inquiry.objects.filter(pk=instance.inquiry_id).values_list('user_id', flat=True).first()
+    Tombstone.objects.create(kind='inquiry_answer', object_id=instance.pk, user_id=user_id)
@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Bed, OutingRollup
+
+
+class BedUnavailable(ValueError):
+    def __init__(self, message, beds):
+        self.beds = beds
+        super().__init__(message)
+
+
+def floor_of(r_number):
+    return r_number // 100
+
+
+def bed_key(dorm):
+    try:
+        r_number, position = int(dorm.r_number), int(dorm.position)
+    except (TypeError, ValueError):
+        return None
+    if dorm.building_name and r_number and position:
+        return dorm.building_name, r_number, position
+    return None
+
+
+def create_beds(buildings):
+    """Create Bed rows for parsed building definitions; existing beds are left alone."""
+    beds = [
+        Bed(
+            building_name=building['name'], r_number=room, position=position,
+            floor=floor_of(room), gender=building['gender'],
+        )
+        for building in buildings
+        for room in building['rooms']
+        for position in range(1, building['beds'] + 1)
+    ]
+    Bed.objects.bulk_create(beds, batch_size=1000, ignore_conflicts=True)
+    return len(beds)
+
+
+def _lock_beds(keys):
+    # Narrow on building and room with indexed IN lists, then keep exact matches.
+    by_building = defaultdict(set)
+    for building_name, r_number, _ in keys:
+        by_building[building_name].add(r_number)
+    condition = Q()
+    for building_name, rooms in by_building.items():
+        condition |= Q(building_name=building_name, r_number__in=rooms)
+    beds = Bed.objects.select_for_update().filter(condition)
+    return {(b.building_name, b.r_number, b.position): b for b in beds if (b.building_name, b.r_number, b.position) in keys}
+
+
+def sync_beds(dorms):
+    """
+    Point bed occupancy at the in-memory assignment of each Dorm in
+    ``dorms``; call it before saving them, inside the caller's transaction.
+    Only the target bed rows are locked, so assignments to other beds go
+    through in parallel. Raises BedUnavailable when two of ``dorms`` want
+    the same bed, or a bed is held by someone outside ``dorms`` or reserved
+    for the other gender. Outing rollups are grouped by building, so the
+    dates these applicants have outings on are recounted once the move
+    commits.
+    """
+    dorms = list(dorms)
+    if not dorms:
+        return
+    wanted = {}
+    doubled = set()
+    for dorm in dorms:
+        key = bed_key(dorm)
+        if key is None:
+            continue
+        if key in wanted:
+            doubled.add(key)
+        wanted[key] = dorm
+    if doubled:
+        raise BedUnavailable('Bed assigned twice.', sorted(doubled))
+
+    with transaction.atomic():
+        # Registered inside the savepoint, so a clash below discards it.
+        dorm_ids = [d.id for d in dorms]
+        transaction.on_commit(lambda: OutingRollup.refresh_for_dorms(dorm_ids))
+        Bed.objects.filter(occupant_id__in=dorm_ids).update(occupant=None)
+        if not wanted:
+            return
+        Bed.objects.bulk_create(
+            [
+                Bed(building_name=b, r_number=r, position=p, floor=floor_of(r), gender=dorm.gender)
+                for (b, r, p), dorm in wanted.items()
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        beds = _lock_beds(wanted)
+
+        taken = [key for key, bed in beds.items() if bed.occupant_id is not None]
+        if taken:
+            raise BedUnavailable('Bed already assigned.', taken)
+        mismatched = [key for key, bed in beds.items() if bed.gender != wanted[key].gender]
+        if mismatched:
+            raise BedUnavailable('Bed is reserved for the other gender.', mismatched)
+        for key, bed in beds.items():
+            bed.occupant_id = wanted[key].id
+        Bed.objects.bulk_update(list(beds.values()), ['occupant'], batch_size=1000)
+
+
+def vacancies(building=None, floor=None, gender=None):
+    """
+    Free beds grouped by building, floor and gender, read in one query
+    over the vacancy index.
+    """
+    beds = Bed.objects.filter(occupant__isnull=True)
+    if gender:
+        beds = beds.filter(gender=gender)
+    if building:
+        beds = beds.filter(building_name=building)
+    if floor is not None:
+        beds = beds.filter(floor=floor)
+    rows = beds.order_by('building_name', 'floor', 'gender', 'r_number', 'position').values_list(
+        'building_name', 'floor', 'gender', 'r_number', 'position'
+    )
+    groups = {}
+    for building_name, bed_floor, bed_gender, r_number, position in rows:
+        group = groups.get((building_name, bed_floor, bed_gender))
+        if group is None:
+            group = groups[(building_name, bed_floor, bed_gender)] = {
+                'building_name': building_name,
+                'floor': bed_floor,
+                'gender': bed_gender,
+                'free_beds': 0,
+                'rooms': {},
+            }
+        group['free_beds'] += 1
+        group['rooms'].setdefault(r_number, []).append(position)
+    return list(groups.values())
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutingApply, OutingRollup
+
+DECISIONS = {'approve': 'approved', 'reject': 'rejected'}
+
+
+class DecisionError(ValueError):
+    pass
+
+
+def decision_queryset(ids=None, out_date=None, status=None):
+    """
+    Applications selected by an id list and/or an out_date/status filter.
+    At least one criterion is required so a bare request can never touch
+    every row.
+    """
+    if not ids and out_date is None and status is None:
+        raise DecisionError('Give ids or at least one of out_date, status.')
+    if status is not None and status not in dict(OutingApply.STATUS_CHOICES):
+        raise DecisionError('Invalid status.')
+    queryset = OutingApply.objects.all()
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+    if out_date is not None:
+        queryset = queryset.filter(out_date=out_date)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def decide(queryset, decision):
+    """
+    Approve or reject every application in ``queryset`` with one UPDATE and
+    return how many rows changed. ``update()`` skips auto_now, so
+    ``updated_at`` is stamped explicitly for the ETag and /api/sync/ readers,
+    and the per-date rollups are recounted since no save signal fires.
+    """
+    if decision not in DECISIONS:
+        raise DecisionError(f"decision must be one of {', '.join(DECISIONS)}.")
+    status = DECISIONS[decision]
+    changing = queryset.exclude(status=status)
+    with transaction.atomic():
+        dates = set(changing.values_list('out_date', flat=True).distinct())
+        updated = changing.update(status=status, updated_at=timezone.now())
+        transaction.on_commit(lambda: OutingRollup.refresh(dates))
+    return updated
@@ -0,0 +1,93 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .search import search
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def get_page_size(request, default=None, maximum=None):
+    default = default or getattr(settings, 'FEED_PAGE_SIZE', 20)
+    maximum = maximum or getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def get_page_number(request):
+    """``?page=`` as a 1-based int; anything missing or malformed is page 1."""
+    try:
+        return max(1, int(request.GET.get('page', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+
+def encode_cursor(obj, field='created_at'):
+    payload = {'v': getattr(obj, field).isoformat(), 'id': obj.pk}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = parse_datetime(payload['v'])
+        pk = int(payload['id'])
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError):
+        raise InvalidCursor(cursor)
+    if value is None:
+        raise InvalidCursor(cursor)
+    return value, pk
+
+
+def keyset_paginate(queryset, request, field='created_at', descending=True, page_size=None):
+    """
+    Slice ``queryset`` on the ``(field, id)`` key instead of OFFSET, so every
+    page costs one indexed range query no matter how deep the reader scrolls.
+    Returns ``(items, next_cursor)``; ``next_cursor`` is None on the last page.
+    Raises InvalidCursor for a malformed ``cursor`` parameter.
+    """
+    size = page_size or get_page_size(request)
+    cursor = request.GET.get('cursor')
+
+    if descending:
+        queryset = queryset.order_by(f'-{field}', '-id')
+    else:
+        queryset = queryset.order_by(field, 'id')
+
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        op = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+        )
+
+    items = list(queryset[:size + 1])
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor(items[-1], field)
+    return items, next_cursor
+
+
+def search_page(queryset, request, query):
+    """
+    Relevance-ordered page of ``query`` matches. Rank order has no stable
+    key to seek on, so these pages are addressed by ``?page=`` instead.
+    Returns ``(items, next_page)``.
+    """
+    size = get_page_size(request)
+    page = get_page_number(request)
+    items = search(queryset, query, offset=(page - 1) * size, limit=size + 1)
+    if len(items) > size:
+        return items[:size], page + 1
+    return items, None
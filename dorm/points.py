@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+
+from .models import PointTransaction, UserProfile
+
+BALANCE_FIELDS = {'reward': 'reward_point', 'penalty': 'penalty_point'}
+
+
+class PointError(ValueError):
+    def __init__(self, message, missing=None):
+        self.missing = missing or []
+        super().__init__(message)
+
+
+def award(student_numbers, point_type, points, awarded_by=None, reason=''):
+    """
+    Give ``points`` of ``point_type`` to every student in ``student_numbers``
+    in one transaction: one ledger row each, and one ``F()`` UPDATE of the
+    balances, so concurrent awards never overwrite each other. Unknown
+    student numbers abort the whole award. Returns the awarded user ids.
+    """
+    if point_type not in BALANCE_FIELDS:
+        raise PointError('Invalid point_type.')
+    if not isinstance(points, int) or isinstance(points, bool) or points == 0:
+        raise PointError('point must be a non-zero integer.')
+    student_numbers = list(dict.fromkeys(str(s).strip() for s in student_numbers if str(s).strip()))
+    if not student_numbers:
+        raise PointError('No students given.')
+
+    field = BALANCE_FIELDS[point_type]
+    with transaction.atomic():
+        ids = dict(User.objects.filter(username__in=student_numbers).values_list('username', 'id'))
+        missing = [s for s in student_numbers if s not in ids]
+        if missing:
+            raise PointError('User not found.', missing)
+        user_ids = [ids[s] for s in student_numbers]
+        # Accounts created before profiles were guaranteed may lack one.
+        UserProfile.objects.bulk_create([UserProfile(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+        PointTransaction.objects.bulk_create(
+            [
+                PointTransaction(
+                    user_id=pk, point_type=point_type, points=points,
+                    reason=reason, awarded_by=awarded_by,
+                )
+                for pk in user_ids
+            ],
+            batch_size=1000,
+        )
+        net_change = points if point_type == 'reward' else -points
+        UserProfile.objects.filter(user_id__in=user_ids).update(**{
+            field: F(field) + points,
+            'net_point': F('net_point') + net_change,
+        })
+    return user_ids
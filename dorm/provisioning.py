@@ -0,0 +1,159 @@
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .hashing import hash_passwords
+from .models import UserProfile
+
+REQUIRED_COLUMNS = ('username', 'password', 'email', 'full_name')
+OPTIONAL_COLUMNS = ('department', 'phone_number')
+HASH_CHUNK = 50
+
+_executor = None
+
+
+class ProvisioningError(ValueError):
+    pass
+
+
+def read_csv(data):
+    """Parse CSV bytes or text (Excel's UTF-8 BOM is accepted) into row dicts."""
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ProvisioningError("CSV must be UTF-8 encoded.")
+    reader = csv.DictReader(io.StringIO(data))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ProvisioningError(f"CSV is missing column(s): {', '.join(missing)}.")
+    return list(reader)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'PROVISIONING_HASH_WORKERS', 4)
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+    return _executor
+
+
+def _hash_all(passwords):
+    hasher = get_hasher('default')
+    if getattr(settings, 'PROVISIONING_HASH_WORKERS', 4) == 0:
+        return [hasher.encode(password, hasher.salt()) for password in passwords]
+    path = f"{type(hasher).__module__}.{type(hasher).__qualname__}"
+    chunks = [passwords[i:i + HASH_CHUNK] for i in range(0, len(passwords), HASH_CHUNK)]
+
+    global _executor
+    try:
+        results = list(get_executor().map(hash_passwords, [path] * len(chunks), chunks))
+    except BrokenProcessPool:
+        _executor = None
+        results = list(get_executor().map(hash_passwords, [path] * len(chunks), chunks))
+    return [encoded for chunk in results for encoded in chunk]
+
+
+def _clean(rows):
+    """Split rows into valid ones and per-line errors; line numbers count the header as line 1."""
+    valid, errors = [], []
+    usernames, emails = set(), set()
+    for line, row in enumerate(rows, start=2):
+        row = {key: (row.get(key) or '').strip() for key in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+        username, email = row['username'], User.objects.normalize_email(row['email'])
+        error = None
+        if not all(row[column] for column in REQUIRED_COLUMNS):
+            error = f"All fields ({', '.join(REQUIRED_COLUMNS)}) are required."
+        elif len(username) > 150:
+            error = 'Username is too long.'
+        elif username in usernames:
+            error = 'Username listed twice.'
+        elif email.lower() in emails:
+            error = 'Email listed twice.'
+        else:
+            try:
+                validate_email(email)
+            except ValidationError:
+                error = 'Invalid email.'
+        if error:
+            errors.append({'line': line, 'username': username, 'error': error})
+            continue
+        usernames.add(username)
+        emails.add(email.lower())
+        row['email'] = email
+        row['line'] = line
+        valid.append(row)
+    return valid, errors
+
+
+def provision_users(rows, batch_size=500, dry_run=False):
+    """
+    Create User and UserProfile rows for ``rows`` (dicts from read_csv) in
+    batches. Usernames that already exist are skipped, so a partly applied
+    import can simply be re-run; an email owned by another account is
+    reported per row. Passwords are hashed on a process pool
+    (PROVISIONING_HASH_WORKERS, 0 = inline), and profiles are bulk-created
+    alongside the users instead of through the per-user post_save signal.
+    """
+    rows, errors = _clean(rows)
+    created = skipped = 0
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        existing = set(
+            User.objects.filter(username__in=[row['username'] for row in batch]).values_list('username', flat=True)
+        )
+        taken_emails = dict(
+            User.objects.filter(email__in=[row['email'] for row in batch]).values_list('email', 'username')
+        )
+        fresh = []
+        for row in batch:
+            if row['username'] in existing:
+                skipped += 1
+            elif row['email'] in taken_emails:
+                errors.append({'line': row['line'], 'username': row['username'], 'error': 'Email already registered.'})
+            else:
+                fresh.append(row)
+        if dry_run:
+            created += len(fresh)
+            continue
+        if not fresh:
+            continue
+
+        hashes = _hash_all([row['password'] for row in fresh])
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(username=row['username'], email=row['email'], password=encoded)
+                    for row, encoded in zip(fresh, hashes)
+                ],
+                ignore_conflicts=True,
+            )
+            ids = dict(
+                User.objects.filter(username__in=[row['username'] for row in fresh]).values_list('username', 'id')
+            )
+            UserProfile.objects.bulk_create(
+                [
+                    UserProfile(
+                        user_id=ids[row['username']],
+                        full_name=row['full_name'],
+                        department=row['department'],
+                        phone_number=row['phone_number'],
+                    )
+                    for row in fresh
+                ],
+                ignore_conflicts=True,
+            )
+        created += len(fresh)
+
+    errors.sort(key=lambda error: error['line'])
+    return {'dry_run': dry_run, 'created': created, 'skipped': skipped, 'errors': errors}
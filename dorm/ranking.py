@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def hot_window():
+    return timedelta(days=getattr(settings, 'HOT_POSTS_WINDOW_DAYS', 7))
+
+
+def hot_score(like_count, comment_count, created_at, now=None):
+    """
+    Engagement divided by a power of age in hours, so a post needs ever more
+    likes and comments to stay on top as it gets older.
+    """
+    now = now or timezone.now()
+    like_weight = getattr(settings, 'HOT_POSTS_LIKE_WEIGHT', 1.0)
+    comment_weight = getattr(settings, 'HOT_POSTS_COMMENT_WEIGHT', 2.0)
+    gravity = getattr(settings, 'HOT_POSTS_GRAVITY', 1.5)
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    points = like_count * like_weight + comment_count * comment_weight
+    return points / (age_hours + 2) ** gravity
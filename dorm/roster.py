@@ -0,0 +1,52 @@
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from .models import OutingApply, OutingRollup
+
+STATUSES = ('approved', 'pending', 'rejected')
+
+
+def roster(day, building=None):
+    """
+    Curfew roster for ``day``: counts per building from the rollup, plus
+    the applicants per status from one query on the out_date index.
+    """
+    rollups = OutingRollup.objects.filter(date=day).order_by('building_name')
+    applies = (
+        OutingApply.objects.filter(out_date=day)
+        .annotate(building=Coalesce(F('user__dorm__building_name'), Value('')))
+        .order_by('building', 'name')
+        .values_list('building', 'name', 'student_number', 'status', 'user__dorm__r_number')
+    )
+    if building is not None:
+        rollups = rollups.filter(building_name=building)
+        applies = applies.filter(building=building)
+
+    buildings = {}
+    for rollup in rollups:
+        buildings[rollup.building_name] = {
+            'building_name': rollup.building_name,
+            'approved': rollup.approved,
+            'pending': rollup.pending,
+            'rejected': rollup.rejected,
+            'students': {status: [] for status in STATUSES},
+        }
+    for building_name, name, student_number, status, r_number in applies:
+        group = buildings.get(building_name)
+        if group is None:
+            # Rollup not written yet (its refresh runs after commit). The
+            # counts stay with the rollup so totals never mix two sources.
+            group = buildings[building_name] = {
+                'building_name': building_name,
+                **{s: 0 for s in STATUSES},
+                'students': {s: [] for s in STATUSES},
+            }
+        group['students'][status].append({
+            'name': name, 'student_number': student_number, 'r_number': r_number or None,
+        })
+    groups = list(buildings.values())
+    return {
+        'date': day,
+        'totals': {status: sum(group[status] for group in groups) for status in STATUSES},
+        'buildings': groups,
+    }
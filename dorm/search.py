@@ -0,0 +1,175 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+
+# Each searchable model maps to the index table that backs it on SQLite.
+# On MySQL the FULLTEXT index lives on the model table itself and is
+# created after every migrate (dorm.indexes) or by the
+# rebuild_search_index command, never during a request.
+FTS_TABLES = {
+    'dorm.post': 'dorm_post_fts',
+    'dorm.notice': 'dorm_notice_fts',
+}
+FULLTEXT_INDEX_NAME = 'fts_title_content'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_ready = set()
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _alias(model, using=None):
+    return using or router.db_for_read(model)
+
+
+def max_results():
+    return getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query or '')
+
+
+def _fts5_query(tokens):
+    # Quote every token so user input can never be read as FTS5 syntax,
+    # and prefix-match it so Korean words still hit when particles follow.
+    return ' '.join('"{}"*'.format(t.replace('"', '""')) for t in tokens)
+
+
+def _boolean_query(tokens):
+    return ' '.join(f'+{t}' for t in tokens)
+
+
+def ensure_index(model, using=None):
+    alias = _alias(model, using)
+    key = (alias, _label(model))
+    if key in _ready:
+        return
+    connection = connections[alias]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLES[_label(model)]} "
+                "USING fts5(title, content, tokenize='unicode61')"
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                [table, FULLTEXT_INDEX_NAME],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD FULLTEXT INDEX {FULLTEXT_INDEX_NAME} "
+                    "(title, content) WITH PARSER ngram"
+                )
+    _ready.add(key)
+
+
+def index_object(instance, using=None):
+    """Mirror ``instance`` into the SQLite FTS5 table. MySQL keeps its FULLTEXT index itself."""
+    model = type(instance)
+    alias = _alias(model, using)
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        return
+    ensure_index(model, alias)
+    table = FTS_TABLES[_label(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+        cursor.execute(
+            f"INSERT INTO {table} (rowid, title, content) VALUES (%s, %s, %s)",
+            [instance.pk, instance.title, instance.content],
+        )
+
+
+def unindex_object(instance, using=None):
+    model = type(instance)
+    alias = _alias(model, using)
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        return
+    ensure_index(model, alias)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLES[_label(model)]} WHERE rowid = %s", [instance.pk])
+
+
+def rebuild_index(model, using=None, batch_size=1000):
+    alias = _alias(model, using)
+    connection = connections[alias]
+    ensure_index(model, alias)
+    if connection.vendor != 'sqlite':
+        return model.objects.using(alias).count()
+    table = FTS_TABLES[_label(model)]
+    count = 0
+    batch = []
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        rows = model.objects.using(alias).values_list('pk', 'title', 'content').iterator(chunk_size=batch_size)
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(f"INSERT INTO {table} (rowid, title, content) VALUES (%s, %s, %s)", batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(f"INSERT INTO {table} (rowid, title, content) VALUES (%s, %s, %s)", batch)
+            count += len(batch)
+    return count
+
+
+def search_ids(model, query, offset=0, limit=None, using=None):
+    """
+    Return primary keys of ``model`` rows matching ``query``, best match first.
+    Titles weigh more than bodies. Results are capped at SEARCH_MAX_RESULTS.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    cap = max_results()
+    limit = cap - offset if limit is None else min(limit, cap - offset)
+    if limit <= 0:
+        return []
+
+    alias = _alias(model, using)
+    connection = connections[alias]
+    table = model._meta.db_table
+
+    if connection.vendor == 'sqlite':
+        ensure_index(model, alias)
+        sql = (
+            f"SELECT rowid FROM {FTS_TABLES[_label(model)]} "
+            f"WHERE {FTS_TABLES[_label(model)]} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLES[_label(model)]}, 10.0, 1.0) LIMIT %s OFFSET %s"
+        )
+        params = [_fts5_query(tokens), limit, offset]
+    elif connection.vendor == 'mysql':
+        match = "MATCH(title, content) AGAINST (%s IN BOOLEAN MODE)"
+        sql = (
+            f"SELECT id FROM {table} WHERE {match} "
+            f"ORDER BY {match} DESC, id DESC LIMIT %s OFFSET %s"
+        )
+        boolean = _boolean_query(tokens)
+        params = [boolean, boolean, limit, offset]
+    else:
+        condition = Q()
+        for token in tokens:
+            condition &= Q(title__icontains=token) | Q(content__icontains=token)
+        qs = model.objects.using(alias).filter(condition).order_by('-pk')
+        return list(qs.values_list('pk', flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(queryset, query, offset=0, limit=None):
+    """Evaluate ``queryset`` restricted to ``query`` matches, in relevance order."""
+    ids = search_ids(queryset.model, query, offset, limit, using=queryset.db)
+    objs = queryset.in_bulk(ids)
+    return [objs[pk] for pk in ids if pk in objs]
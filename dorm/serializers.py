@@ -2,8 +2,10 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     Dorm, OutingApply, Notice, Post, Comment,
-    UserProfile, Inquiry, InquiryAnswer, Like
+    UserProfile, Inquiry, InquiryAnswer, Like, PointTransaction
 )
+from .occupancy import sync_beds
+from .points import BALANCE_FIELDS, award
 
 class DormSerializer(serializers.ModelSerializer):
     user_id   = serializers.IntegerField(source='user.id', read_only=True)
@@ -34,9 +36,11 @@ class OutingApplySerializer(serializers.ModelSerializer):
         read_only_fields = ['applied_at', 'status', 'status_display']
 
 class NoticeSerializer(serializers.ModelSerializer):
+    image_variants = serializers.JSONField(read_only=True)
+
     class Meta:
         model = Notice
-        fields = ['id','title','content','image','date']
+        fields = ['id','title','content','image','image_variants','date']
 
 class NoticeCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -62,28 +66,52 @@ class PostSerializer(serializers.ModelSerializer):
     author_id   = serializers.IntegerField(source='author.id', read_only=True)
     anon_author = serializers.SerializerMethodField()
     comments    = CommentSerializer(many=True, read_only=True)
-    like_count  = serializers.IntegerField(source='likes.count', read_only=True)
+    like_count  = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
     is_liked    = serializers.SerializerMethodField()
+    image_variants = serializers.JSONField(read_only=True)
 
     class Meta:
         model = Post
         fields = [
             'id','author_id','anon_author','title','content',
-            'image','created_at','updated_at','comments',
-            'like_count','is_liked'
+            'image','image_variants','created_at','updated_at','comments',
+            'like_count','comment_count','is_liked'
         ]
 
     def get_anon_author(self, obj):
         return f"{obj.author.id%10000:04d}"
 
     def get_is_liked(self, obj):
-        user = self.context['request'].user
-        return obj.likes.filter(user=user).exists()
+        liked_ids = self.context.get('liked_post_ids')
+        if liked_ids is not None:
+            return obj.id in liked_ids
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.likes.filter(user=request.user).exists()
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         return super().create(validated_data)
 
+class PostListSerializer(PostSerializer):
+    class Meta(PostSerializer.Meta):
+        fields = [
+            'id','author_id','anon_author','title','content',
+            'image','image_variants','created_at','updated_at',
+            'like_count','comment_count','is_liked'
+        ]
+
+class PointTransactionSerializer(serializers.ModelSerializer):
+    student_number = serializers.CharField(source='user.username', read_only=True)
+    awarded_by = serializers.CharField(source='awarded_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = PointTransaction
+        fields = ['id', 'student_number', 'point_type', 'points', 'reason', 'awarded_by', 'created_at']
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     user_id      = serializers.IntegerField(source='user.id', read_only=True)
     username     = serializers.CharField(source='user.username', read_only=True)
@@ -159,37 +187,66 @@ class UserAdminDetailSerializer(serializers.ModelSerializer):
             'reward_point', 'penalty_point', 'building_name', 'r_number', 'building_room'
         ]
 
+    @staticmethod
+    def _dorm(obj):
+        # Reads the reverse one-to-one, so select_related('dorm') makes this
+        # free and otherwise it is fetched once and cached on the user.
+        try:
+            return obj.dorm
+        except Dorm.DoesNotExist:
+            return None
+
     def get_building_name(self, obj):
-        dorm = Dorm.objects.filter(user=obj).first()
+        dorm = self._dorm(obj)
         return dorm.building_name if dorm else ""
 
     def get_r_number(self, obj):
-        dorm = Dorm.objects.filter(user=obj).first()
+        dorm = self._dorm(obj)
         return dorm.r_number if dorm else None
 
     def get_building_room(self, obj):
-        dorm = Dorm.objects.filter(user=obj).first()
+        dorm = self._dorm(obj)
         if dorm and dorm.building_name:
             return f"{dorm.building_name} {dorm.r_number}호"
         return ""
 
     def update(self, instance, validated_data):
         profile_data = validated_data.pop('userprofile', {})
+        request = self.context.get('request')
+        # Balances only move through the ledger: a new value becomes an award
+        # of the difference against the locked current row.
+        targets = {
+            point_type: profile_data.pop(field)
+            for point_type, field in BALANCE_FIELDS.items() if field in profile_data
+        }
+        if targets:
+            current = UserProfile.objects.select_for_update().filter(user=instance).first()
+            for point_type, target in targets.items():
+                delta = target - (getattr(current, BALANCE_FIELDS[point_type]) if current else 0)
+                if delta:
+                    award(
+                        [instance.username], point_type, delta,
+                        awarded_by=request.user if request else None, reason='Adjusted by admin',
+                    )
+
         profile = getattr(instance, 'userprofile', None)
         if profile and profile_data:
             for attr, value in profile_data.items():
                 setattr(profile, attr, value)
-            profile.save()
+            # Only the edited columns, so a concurrent award is not overwritten.
+            profile.save(update_fields=list(profile_data))
+        if profile and targets:
+            profile.refresh_from_db(fields=['reward_point', 'penalty_point', 'net_point'])
 
-        dorm = Dorm.objects.filter(user=instance).first()
+        dorm = self._dorm(instance)
         dorm_updated = False
-        request = self.context.get('request')
         if dorm and request and request.data:
             for field in ['building_name', 'r_number']:
                 if field in request.data:
                     setattr(dorm, field, request.data[field])
                     dorm_updated = True
             if dorm_updated:
+                sync_beds([dorm])
                 dorm.save()
 
         return super().update(instance, validated_data)
@@ -0,0 +1,50 @@
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import Dorm, UserProfile
+
+COLUMNS = ('user_ref', 'display_name', 'number', 'dept')
+
+
+def _profiles(**lookup):
+    return UserProfile.objects.filter(**lookup).annotate(
+        user_ref=F('user_id'),
+        display_name=Coalesce(
+            NullIf(F('full_name'), Value('')), NullIf(F('user__dorm__name'), Value('')), F('user__username'),
+        ),
+        number=F('user__username'),
+        dept=F('department'),
+    ).values_list(*COLUMNS)
+
+
+def _unlinked_dorms(**lookup):
+    # Applicants without an account only exist as Dorm rows.
+    return Dorm.objects.filter(user__isnull=True, **lookup).annotate(
+        user_ref=F('user_id'),
+        display_name=F('name'),
+        number=F('student_number'),
+        dept=Value('', output_field=CharField()),
+    ).values_list(*COLUMNS)
+
+
+def search_students(query, offset=0, limit=20):
+    """
+    Students whose number or name starts with ``query``, ordered by student
+    number. Each branch is a single prefix match on its own index; the UNION
+    merges and de-duplicates them in one bounded query.
+    Returns ``(rows, has_more)``.
+    """
+    branches = [
+        _profiles(user__username__startswith=query),
+        _profiles(full_name__startswith=query),
+        _profiles(user__dorm__name__startswith=query),
+        _unlinked_dorms(student_number__startswith=query),
+        _unlinked_dorms(name__startswith=query),
+    ]
+    merged = branches[0].union(*branches[1:]).order_by('number', 'user_ref')
+    rows = list(merged[offset:offset + limit + 1])
+    results = [
+        {'id': user_id, 'fullName': name or '', 'studentNumber': number or '', 'department': dept or ''}
+        for user_id, name, number, dept in rows[:limit]
+    ]
+    return results, len(rows) > limit
@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+EPOCH = '1970-01-01T00:00:00+00:00'
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_token(cursors):
+    raw = json.dumps(cursors, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token, sections):
+    """Return ``{section: (datetime, id)}``; sections missing from the token start at the epoch."""
+    cursors = {}
+    if token:
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            cursors = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(cursors, dict):
+                raise ValueError
+        except (ValueError, TypeError, json.JSONDecodeError):
+            raise InvalidSyncToken(token)
+    decoded = {}
+    for section in sections:
+        entry = cursors.get(section, (EPOCH, 0))
+        if not isinstance(entry, (list, tuple)) or len(entry) != 2:
+            raise InvalidSyncToken(token)
+        value, pk = entry
+        try:
+            moment = parse_datetime(value) if isinstance(value, str) else None
+        except (TypeError, ValueError):
+            raise InvalidSyncToken(token)
+        if moment is None or not isinstance(pk, int) or isinstance(pk, bool):
+            raise InvalidSyncToken(token)
+        decoded[section] = (moment, pk)
+    return decoded
+
+
+def overlap():
+    # Rows are stamped before their transaction commits, so a caught-up
+    # section rewinds a little to pick up late commits. Clients upsert by id.
+    return timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 30))
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+
+
+def changes_since(queryset, field, cursor, limit):
+    """
+    Rows of ``queryset`` changed after ``cursor`` in ``(field, id)`` order.
+    Returns ``(rows, next_cursor, has_more)``.
+    """
+    moment, pk = cursor
+    rows = list(
+        queryset.filter(Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk}))
+        .order_by(field, 'id')[:limit + 1]
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, (getattr(last, field).isoformat(), last.pk), True
+    caught_up = max(moment, timezone.now() - overlap())
+    return rows, (caught_up.isoformat(), 0), False
@@ -1,3 +1,494 @@
-from django.test import TestCase
+import asyncio
+import shutil
+import tempfile
+from concurrent.futures import Future
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dorm import provisioning
+from dorm.allocation import AllocationError, _free_beds, allocate_rooms, parse_buildings
+from dorm.serializers import UserAdminDetailSerializer
+from dorm.events import DatabaseBackend
+from dorm.models import Bed, Dorm, Event, Notice, OutingApply, Post, OutingRollup, PointTransaction, UserProfile
+from dorm.occupancy import BedUnavailable, sync_beds
+from dorm.points import award
+from dorm.roster import roster
+from dorm.sync import InvalidSyncToken, decode_token, encode_token
+
+
+def make_student(username, gender='male', **dorm):
+    user = User.objects.create_user(username, password='pw')
+    return Dorm.objects.create(user=user, name=username, student_number=username, gender=gender, **dorm)
+
+
+def assign(dorm, building_name, r_number, position):
+    dorm.building_name, dorm.r_number, dorm.position = building_name, r_number, position
+    sync_beds([dorm])
+    dorm.save()
+    return dorm
+
+
+def staff_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('staff', password='pw', is_staff=True))
+    return client
+
+
+@override_settings(PROVISIONING_HASH_WORKERS=2)
+class ProvisionUsersTests(TestCase):
+    def tearDown(self):
+        if provisioning._executor is not None:
+            provisioning._executor.shutdown()
+            provisioning._executor = None
+
+    def rows(self, count):
+        return [
+            {
+                'username': f'2024{n:04d}', 'password': f'pw-{n}', 'email': f's{n}@example.com',
+                'full_name': f'학생{n}', 'department': 'CS',
+            }
+            for n in range(count)
+        ]
+
+    def test_hashes_on_the_process_pool(self):
+        result = provisioning.provision_users(self.rows(120), batch_size=50)
+
+        self.assertEqual(result['created'], 120)
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(UserProfile.objects.filter(department='CS').count(), 120)
+        self.assertIsNotNone(authenticate(username='20240119', password='pw-119'))
+
+    def test_rerun_skips_existing_usernames(self):
+        provisioning.provision_users(self.rows(10))
+        result = provisioning.provision_users(self.rows(12))
+
+        self.assertEqual((result['created'], result['skipped']), (2, 10))
+        self.assertEqual(User.objects.count(), 12)
+
+
+class OutingRosterTests(TestCase):
+    day = date(2025, 3, 7)
+
+    def test_refresh_needs_no_upsert_support(self):
+        # MySQL, the default backend, cannot target a unique constraint on conflict.
+        dorm = make_student('20240001', building_name='A동', r_number=201, position=1)
+        OutingApply.objects.create(user=dorm.user, name='학생', student_number='20240001', out_date=self.day)
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            OutingRollup.refresh([self.day])
+            OutingApply.objects.update(status='approved')
+            OutingRollup.refresh([self.day])
+
+        self.assertEqual(
+            list(OutingRollup.objects.values_list('building_name', 'pending', 'approved')), [('A동', 0, 1)],
+        )
+
+    def test_room_move_recounts_the_rollup(self):
+        dorm = make_student('20240001')
+        with self.captureOnCommitCallbacks(execute=True):
+            OutingApply.objects.create(
+                user=dorm.user, name='학생', student_number='20240001', out_date=self.day, status='approved',
+            )
+        self.assertEqual(roster(self.day)['totals']['approved'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = staff_client().patch(
+                '/api/dorm-applications/bulk/',
+                {'updates': [{'id': dorm.id, 'building_name': 'A동', 'r_number': 201, 'position': 1}]},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        result = roster(self.day)
+        self.assertEqual(result['totals']['approved'], 1)
+        self.assertEqual([group['building_name'] for group in result['buildings']], ['A동'])
+        self.assertEqual(result['buildings'][0]['students']['approved'][0]['r_number'], 201)
+        self.assertEqual(list(OutingRollup.objects.values_list('building_name', 'approved')), [('A동', 1)])
+
+    def test_impossible_date_is_a_bad_request(self):
+        client = staff_client()
+        for value in ('2025-02-30', 'tomorrow'):
+            with self.subTest(date=value):
+                response = client.get('/api/sleepover/roster/', {'date': value})
+                self.assertEqual(response.status_code, 400)
+
+    def test_unrolled_building_adds_no_count(self):
+        dorm = make_student('20240002', building_name='B동', r_number=301, position=1)
+        OutingApply.objects.create(user=dorm.user, name='학생', student_number='20240002', out_date=self.day)
+
+        result = roster(self.day)
+        self.assertEqual(result['totals']['pending'], 0)
+        self.assertEqual(len(result['buildings'][0]['students']['pending']), 1)
+
+
+class AllocateRoomsTests(TestCase):
+    def building(self, gender):
+        return [{'name': 'B동', 'gender': gender, 'beds': 2, 'rooms': [301, 302]}]
+
+    def test_overlapping_room_definitions_are_rejected(self):
+        definitions = [
+            {'rooms': [301, 301]},
+            {'floors': [2, 3], 'rooms_per_floor': 100},
+            {'floors': [2, 2], 'rooms_per_floor': 10},
+        ]
+        for rooms in definitions:
+            with self.subTest(rooms=rooms):
+                with self.assertRaises(AllocationError):
+                    parse_buildings([{'name': 'A동', 'gender': 'male', 'beds': 2, **rooms}])
+
+    def test_duplicate_rooms_assign_nobody(self):
+        for n in range(4):
+            make_student(f'2024000{n}')
+        with self.assertRaises(AllocationError):
+            allocate_rooms([{'name': 'A동', 'gender': 'male', 'beds': 2, 'rooms': [301, 301]}])
+        self.assertFalse(Dorm.objects.exclude(building_name='').exists())
+
+    def test_free_beds_are_queued_once(self):
+        buildings = [{'name': 'A동', 'gender': 'male', 'beds': 2, 'rooms': [301, 301]}]
+        free = _free_beds(buildings, occupied={('A동', 301, 2)}, beds={})
+        self.assertEqual(list(free['male']), [('A동', 301, 1)])
+
+    def test_rerun_keeps_the_gender_of_existing_beds(self):
+        make_student('20240001')
+        allocate_rooms(self.building('male'))
+        make_student('20240002')
+        make_student('20240003', gender='female')
+
+        response = staff_client().post(
+            '/api/dorm-applications/allocate/', {'buildings': self.building('female')}, format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        allocation = response.json()['allocation']
+        self.assertEqual(allocation['assigned'], 1)
+        self.assertEqual(allocation['unassigned'], {'female': 1})
+        self.assertEqual(
+            Bed.objects.get(occupant__student_number='20240002').gender, 'male',
+        )
+        self.assertEqual(Dorm.objects.get(student_number='20240003').building_name, '')
+
+
+@override_settings(SYNC_PAGE_SIZE=2, SYNC_OVERLAP_SECONDS=0)
+class SyncTokenTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('20240001', password='pw'))
+
+    def test_token_round_trip(self):
+        cursors = {'notices': ['2025-03-07T09:00:00+00:00', 4]}
+        decoded = decode_token(encode_token(cursors), ['notices', 'posts'])
+
+        self.assertEqual(decoded['notices'][0].isoformat(), '2025-03-07T09:00:00+00:00')
+        self.assertEqual(decoded['notices'][1], 4)
+        self.assertEqual(decoded['posts'][1], 0)
+
+    def test_pages_through_changes_with_the_returned_token(self):
+        for n in range(3):
+            Notice.objects.create(title=f'공지 {n}', content='내용')
+
+        first = self.client.get('/api/sync/').json()
+        second = self.client.get('/api/sync/', {'since': first['token']}).json()
+
+        self.assertTrue(first['has_more'])
+        self.assertEqual(
+            [n['title'] for n in first['notices'] + second['notices']], ['공지 0', '공지 1', '공지 2'],
+        )
+        self.assertFalse(second['has_more'])
+
+    def test_malformed_tokens_are_rejected(self):
+        tokens = [
+            'not-base64!',
+            encode_token([1, 2]),
+            encode_token({'notices': 5}),
+            encode_token({'notices': ['2025-03-07T09:00:00', 1, 2]}),
+            encode_token({'notices': ['yesterday', 1]}),
+            encode_token({'notices': ['2025-13-45T09:00:00', 1]}),
+            encode_token({'notices': ['2025-03-07T09:00:00', '1']}),
+        ]
+        for token in tokens:
+            with self.subTest(token=token):
+                with self.assertRaises(InvalidSyncToken):
+                    decode_token(token, ['notices'])
+                response = self.client.get('/api/sync/', {'since': token})
+                self.assertEqual(response.status_code, 400)
+
+
+class AdminPointEditTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('20240001', password='pw')
+
+    def test_profile_edit_keeps_a_concurrent_award(self):
+        stale = User.objects.select_related('userprofile').get(pk=self.user.pk)
+        award(['20240001'], 'reward', 5)
+
+        serializer = UserAdminDetailSerializer(stale, data={'phone_number': '010-1234-5678'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.phone_number, profile.reward_point, profile.net_point), ('010-1234-5678', 5, 5))
+
+    def test_point_edit_goes_through_the_ledger(self):
+        award(['20240001'], 'penalty', 2)
+        client = staff_client()
+
+        response = client.patch(
+            f'/api/admin/user/{self.user.pk}/', {'reward_point': 7, 'penalty_point': 2}, format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['reward_point'], 7)
+        self.assertEqual(
+            list(PointTransaction.objects.order_by('id').values_list('point_type', 'points')),
+            [('penalty', 2), ('reward', 7)],
+        )
+        self.assertEqual(UserProfile.objects.get(user=self.user).net_point, 5)
+
+
+class SyncBedsTests(TestCase):
+    def test_assigns_and_frees_beds(self):
+        dorm = assign(make_student('20240001'), 'A동', 201, 1)
+        self.assertEqual(Bed.objects.get(occupant=dorm).r_number, 201)
+
+        assign(dorm, 'A동', 202, 2)
+        self.assertEqual(
+            list(Bed.objects.filter(occupant__isnull=True).values_list('r_number', 'position')), [(201, 1)],
+        )
+
+    def test_taken_bed_is_refused(self):
+        assign(make_student('20240001'), 'A동', 201, 1)
+        other = make_student('20240002')
+        other.building_name, other.r_number, other.position = 'A동', 201, 1
+
+        with self.assertRaises(BedUnavailable) as caught:
+            sync_beds([other])
+        self.assertEqual(str(caught.exception), 'Bed already assigned.')
+        self.assertEqual(caught.exception.beds, [('A동', 201, 1)])
+
+    def test_two_dorms_for_one_bed_are_refused(self):
+        first, second = make_student('20240001'), make_student('20240002')
+        for dorm in (first, second):
+            dorm.building_name, dorm.r_number, dorm.position = 'A동', 301, 1
+
+        with self.assertRaises(BedUnavailable) as caught:
+            sync_beds([first, second])
+        self.assertEqual(caught.exception.beds, [('A동', 301, 1)])
+        self.assertFalse(Bed.objects.filter(occupant__isnull=False).exists())
+
+    def test_bed_of_the_other_gender_is_refused(self):
+        Bed.objects.create(building_name='A동', r_number=201, position=2, floor=2, gender='male')
+        other = make_student('20240002', gender='female')
+        other.building_name, other.r_number, other.position = 'A동', 201, 2
+
+        with self.assertRaises(BedUnavailable) as caught:
+            sync_beds([other])
+        self.assertEqual(str(caught.exception), 'Bed is reserved for the other gender.')
+        self.assertFalse(Bed.objects.filter(occupant=other).exists())
+
+    def test_detail_patch_reports_a_clash(self):
+        assign(make_student('20240001'), 'A동', 201, 1)
+        other = make_student('20240002')
+
+        response = staff_client().patch(
+            f'/api/dorm-applications/{other.id}/',
+            {'building_name': 'A동', 'r_number': 201, 'position': 1}, format='json',
+        )
+
+        self.assertEqual(response.status_code, 409)
+        other.refresh_from_db()
+        self.assertEqual(other.building_name, '')
+
+
+class BulkDormUpdateTests(TestCase):
+    def setUp(self):
+        self.client = staff_client()
+        self.first = assign(make_student('20240001'), 'A동', 201, 1)
+        self.second = assign(make_student('20240002'), 'A동', 201, 2)
+
+    def patch(self, updates):
+        return self.client.patch('/api/dorm-applications/bulk/', {'updates': updates}, format='json')
+
+    def bed(self, dorm):
+        return Bed.objects.filter(occupant=dorm).values_list('building_name', 'r_number', 'position').first()
+
+    def test_swaps_beds_in_one_batch(self):
+        response = self.patch([
+            {'id': self.first.id, 'position': 2},
+            {'id': self.second.id, 'position': 1},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.bed(self.first), ('A동', 201, 2))
+        self.assertEqual(self.bed(self.second), ('A동', 201, 1))
+        self.assertEqual(Dorm.objects.get(pk=self.first.pk).position, 2)
+
+    def test_two_applicants_for_one_bed_apply_nothing(self):
+        third = make_student('20240003')
+        response = self.patch([
+            {'id': self.first.id, 'r_number': 202, 'position': 1},
+            {'id': third.id, 'building_name': 'A동', 'r_number': 202, 'position': 1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result['error'] for result in response.json()['results']], ['Bed already assigned.'] * 2,
+        )
+        self.assertEqual(self.bed(self.first), ('A동', 201, 1))
+        self.assertIsNone(self.bed(third))
+
+    def test_bed_held_outside_the_batch_applies_nothing(self):
+        third = make_student('20240003')
+        response = self.patch([
+            {'id': third.id, 'building_name': 'A동', 'r_number': 201, 'position': 2},
+            {'id': self.first.id, 'r_number': 203},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        results = {result['id']: result for result in response.json()['results']}
+        self.assertEqual(results[third.id]['error'], 'Bed already assigned.')
+        self.assertTrue(results[self.first.id]['success'])
+        self.assertEqual(Dorm.objects.get(pk=self.first.pk).r_number, 201)
+
+    def test_gender_clash_is_a_conflict(self):
+        Bed.objects.create(building_name='A동', r_number=201, position=3, floor=2, gender='male')
+        female = make_student('20240003', gender='female')
+        response = self.patch([
+            {'id': female.id, 'building_name': 'A동', 'r_number': 201, 'position': 3},
+        ])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['results'][0]['error'], 'Bed is reserved for the other gender.')
+        self.assertEqual(Dorm.objects.get(pk=female.pk).building_name, '')
+
+
+class BulkDecideOutingsTests(TestCase):
+    day = date(2025, 3, 7)
+
+    def setUp(self):
+        self.client = staff_client()
+        dorm = make_student('20240001')
+        self.outings = [
+            OutingApply.objects.create(user=dorm.user, name='학생', student_number='20240001', out_date=out_date)
+            for out_date in (self.day, self.day, date(2025, 3, 8))
+        ]
+
+    def decide(self, payload):
+        return self.client.post('/api/sleepover/decide/', payload, format='json')
+
+    def statuses(self):
+        return list(OutingApply.objects.order_by('id').values_list('status', flat=True))
+
+    def test_decides_an_id_list(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.decide({'decision': 'approve', 'ids': [self.outings[0].id, self.outings[2].id]})
+
+        self.assertEqual(response.json(), {'success': True, 'updated': 2})
+        self.assertEqual(self.statuses(), ['approved', 'pending', 'approved'])
+        self.assertEqual(OutingRollup.objects.get(date=self.day).approved, 1)
+
+    def test_decides_by_filter(self):
+        OutingApply.objects.filter(pk=self.outings[1].pk).update(status='approved')
+        response = self.decide({'decision': 'reject', 'filter': {'out_date': '2025-03-07', 'status': 'pending'}})
+
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(self.statuses(), ['rejected', 'approved', 'pending'])
+
+    def test_bad_requests_change_nothing(self):
+        payloads = [
+            {'decision': 'reject', 'filter': {'out_date': '2025-02-30'}},
+            {'decision': 'reject', 'filter': {'out_date': 'tomorrow'}},
+            {'decision': 'reject'},
+            {'decision': 'maybe', 'ids': [self.outings[0].id]},
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                self.assertEqual(self.decide(payload).status_code, 400)
+        self.assertEqual(self.statuses(), ['pending'] * 3)
+
+
+class EventStreamTests(TestCase):
+    def test_wsgi_requests_are_refused(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 501)
+
+    async def test_asgi_requests_stream(self):
+        response = await AsyncClient().get('/api/events/', {'topics': 'notice'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+
+class DatabaseBackendTests(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscriber(self, backend):
+        queue = asyncio.Queue()
+        backend._subscribers.add((self.loop, queue))
+        return queue
+
+    def received(self, queue):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        events = []
+        while not queue.empty():
+            events.append(queue.get_nowait())
+        return events
+
+    def test_published_rows_reach_every_process(self):
+        publisher, listener = DatabaseBackend(), DatabaseBackend()
+        listener._start = lambda: None
+        listener._last_id = 0
+        queue = self.subscriber(listener)
+
+        publisher.publish('notice', {'id': 7, 'title': '공지'})
+        self.assertEqual(listener.poll(), 1)
+
+        event = Event.objects.get()
+        self.assertEqual(
+            self.received(queue), [{'id': event.id, 'topic': 'notice', 'data': {'id': 7, 'title': '공지'}}],
+        )
+        self.assertEqual(listener.poll(), 0)
+
+    def test_start_seeds_the_replay_history(self):
+        backend = DatabaseBackend()
+        backend.publish('like', {'post_id': 1})
+        backend.publish('like', {'post_id': 2})
+
+        with mock.patch('dorm.events.threading.Thread'):
+            backend._start()
+
+        self.assertEqual([e['data']['post_id'] for e in backend._history], [1, 2])
+        self.assertEqual(backend._last_id, Event.objects.latest('id').id)
+
+
+class PostImageVariantTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_feed_etag_changes_when_variants_finish(self):
+        future = Future()
+        author = User.objects.create_user('20240001', password='pw')
+        with mock.patch('dorm.models.generate_variants', return_value=future):
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(
+                    author=author, title='사진', content='내용', image=SimpleUploadedFile('a.png', b'png'),
+                )
+        Post.objects.filter(pk=post.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        etag = self.client.get('/api/posts/')['ETag']
+
+        future.set_result(['a_480.webp'])
+
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Max, Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import (
@@ -12,7 +17,7 @@ from rest_framework.response import Response
 
 from .models import (
     Dorm, OutingApply, Notice, Post, Comment,
-    UserProfile, Inquiry, InquiryAnswer, Like
+    UserProfile, Inquiry, InquiryAnswer, Like, PostScore, Tombstone, PointTransaction
 )
 from .serializers import (
     DormSerializer,
@@ -20,6 +25,7 @@ from .serializers import (
     NoticeSerializer,
     NoticeCreateSerializer,
     PostSerializer,
+    PostListSerializer,
     CommentSerializer,
     UserProfileSerializer,
     InquirySerializer,
@@ -27,9 +33,56 @@ from .serializers import (
     InquiryAnswerSerializer,
     InquiryAnswerCreateSerializer,
     UserAdminDetailSerializer,
+    PointTransactionSerializer,
 )
 from .permissions import IsAuthorOrAdmin, IsInquiryUserOrAdmin
+from .allocation import AllocationError, allocate_rooms
+from .cache import cached_leaderboard, cached_notices
+from .leaderboard import leaderboard
+from .conditional import compute_validators, etag_for, not_modified, set_validators
+from .events import TOPICS, format_event, get_backend
+from . import exports
+from .outings import DecisionError, decide, decision_queryset
+from .points import PointError, award
+from .roster import roster
+from .students import search_students
+from .occupancy import BedUnavailable, bed_key, sync_beds, vacancies
+from .provisioning import ProvisioningError, provision_users, read_csv
+from .pagination import InvalidCursor, get_page_number, get_page_size, keyset_paginate, search_page
+from .sync import InvalidSyncToken, changes_since, decode_token, encode_token, tombstone_retention
 from datetime import date
+from django.utils.dateparse import parse_date
+import asyncio
+
+
+def liked_post_ids(user, posts):
+    if not user.is_authenticated:
+        return set()
+    return set(
+        Like.objects.filter(user=user, post_id__in=[p.id for p in posts])
+        .values_list('post_id', flat=True)
+    )
+
+
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def import_users_api(request):
+    """Bulk-create accounts from an uploaded CSV (``file``); see dorm.provisioning for the columns."""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'error': 'file is required.'}, status=400)
+    try:
+        rows = read_csv(upload.read())
+    except ProvisioningError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+    result = provision_users(rows, dry_run=dry_run)
+    return JsonResponse({'success': not result['errors'], 'import': result})
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -122,31 +175,115 @@ def give_point_api(request):
         return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
     student_id = request.data.get('student_id')
     point_type = request.data.get('point_type')
-    point = int(request.data.get('point', 0))
+    try:
+        point = int(request.data.get('point', 0))
+    except (TypeError, ValueError):
+        point = 0
     if not all([student_id, point_type]) or point == 0:
         return JsonResponse({'success': False, 'error': 'All fields are required.'}, status=400)
     try:
-        target = User.objects.get(username=student_id).userprofile
-    except (User.DoesNotExist, UserProfile.DoesNotExist):
-        return JsonResponse({'success': False, 'error': 'User not found.'}, status=404)
-    if point_type == 'reward':
-        target.reward_point += point
-    elif point_type == 'penalty':
-        target.penalty_point += point
-    else:
-        return JsonResponse({'success': False, 'error': 'Invalid point_type.'}, status=400)
-    target.save()
+        award([student_id], point_type, point, awarded_by=request.user, reason=request.data.get('reason', ''))
+    except PointError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=404 if e.missing else 400)
+    target = UserProfile.objects.select_related('user').get(user__username=student_id)
     return JsonResponse({'success': True, 'profile': UserProfileSerializer(target).data})
 
+
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def award_points_api(request):
+    """Award the same points to many students at once: ``{"student_ids": [...], "point_type", "point", "reason"}``."""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    student_ids = request.data.get('student_ids')
+    limit = getattr(settings, 'BULK_UPDATE_MAX_ITEMS', 1000)
+    if not isinstance(student_ids, list) or not student_ids:
+        return JsonResponse({'success': False, 'error': 'student_ids must be a non-empty list.'}, status=400)
+    if len(student_ids) > limit:
+        return JsonResponse({'success': False, 'error': f'At most {limit} students per request.'}, status=400)
+    try:
+        user_ids = award(
+            student_ids, request.data.get('point_type'), request.data.get('point'),
+            awarded_by=request.user, reason=str(request.data.get('reason', ''))[:200],
+        )
+    except PointError as e:
+        return JsonResponse({'success': False, 'error': str(e), 'missing': e.missing}, status=400)
+    return JsonResponse({'success': True, 'awarded': len(user_ids)})
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def leaderboard_api(request):
+    """Residents ranked by reward minus penalty points. Filters: ?department=, ?building=; paged by ?page=."""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    size = get_page_size(request)
+    page = get_page_number(request)
+    department = request.GET.get('department') or None
+    building = request.GET.get('building') or None
+    entries, has_next = cached_leaderboard(
+        f'{department}|{building}|{page}|{size}',
+        lambda: leaderboard(department=department, building=building, page=page, size=size),
+    )
+    return JsonResponse({
+        'success': True,
+        'leaderboard': entries,
+        'next_page': page + 1 if has_next else None,
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def point_history_api(request):
+    """A student's point ledger, newest first. Staff pass ?student_id=; students see their own."""
+    user = request.user
+    student_id = request.GET.get('student_id')
+    if student_id and student_id != user.username:
+        if not user.is_staff:
+            return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+        user = User.objects.filter(username=student_id).first()
+        if user is None:
+            return JsonResponse({'success': False, 'error': 'User not found.'}, status=404)
+    entries = PointTransaction.objects.filter(user=user).select_related('user', 'awarded_by')
+    try:
+        items, next_cursor = keyset_paginate(entries, request)
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor.'}, status=400)
+    return JsonResponse({
+        'success': True,
+        'transactions': PointTransactionSerializer(items, many=True).data,
+        'next_cursor': next_cursor,
+    })
+
 @api_view(['GET', 'POST'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticatedOrReadOnly])
 @parser_classes([MultiPartParser, FormParser, JSONParser])
 def notices_api(request):
     if request.method == 'GET':
-        notices = Notice.objects.order_by('-date')
-        data = NoticeSerializer(notices, many=True).data
-        return JsonResponse({'success': True, 'notices': data})
+        path = request.get_full_path()
+
+        def build():
+            q = request.GET.get('q', '').strip()
+            if q:
+                notices, next_page = search_page(Notice.objects.all(), request, q)
+                body = {'success': True, 'notices': NoticeSerializer(notices, many=True).data, 'next_page': next_page}
+            else:
+                notices = Notice.objects.order_by('-date')
+                body = {'success': True, 'notices': NoticeSerializer(notices, many=True).data}
+            last_modified = Notice.objects.aggregate(last=Max('updated_at'))['last']
+            return {'body': body, 'last_modified': last_modified}
+
+        version, payload = cached_notices(f'api:{path}', build)
+        etag = etag_for(version, path)
+        cached = not_modified(request, etag, payload['last_modified'])
+        if cached:
+            return cached
+        return set_validators(JsonResponse(payload['body']), etag, payload['last_modified'])
 
     user = request.user
     if not user or not user.is_authenticated:
@@ -204,6 +341,7 @@ def apply_outing_api(request):
             status=400
         )
     outing = OutingApply.objects.create(
+        user=request.user if stud == request.user.username else None,
         name=name,
         student_number=stud,
         out_date=outdate
@@ -219,9 +357,13 @@ def outing_apply_status_api(request):
     if user.is_staff:
         applies = OutingApply.objects.all().order_by('-applied_at')
     else:
-        applies = OutingApply.objects.filter(student_number=user.username).order_by('-applied_at')
+        applies = OutingApply.objects.filter(user=user).order_by('-applied_at')
+    etag, last_modified = compute_validators(applies, 'updated_at', user.pk)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
     serializer = OutingApplySerializer(applies, many=True)
-    return JsonResponse({'success': True, 'list': serializer.data})
+    return set_validators(JsonResponse({'success': True, 'list': serializer.data}), etag, last_modified)
 
 
 @api_view(['POST'])
@@ -252,23 +394,108 @@ def reject_outing_api(request, pk):
     outing.status = 'rejected'
     outing.save()
     return JsonResponse({'success': True})
-    
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def outing_roster_api(request):
+    """Who is out on ?date= (default today), per building; ?building= narrows it."""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    try:
+        day = parse_date(request.GET['date']) if request.GET.get('date') else timezone.localdate()
+    except ValueError:
+        day = None
+    if day is None:
+        return JsonResponse({'success': False, 'error': 'Invalid date.'}, status=400)
+    return JsonResponse({'success': True, 'roster': roster(day, request.GET.get('building'))})
+
+
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def bulk_decide_outings_api(request):
+    """
+    Approve or reject many outing applications at once:
+    ``{"decision": "approve", "ids": [1, 2]}`` or
+    ``{"decision": "reject", "filter": {"out_date": "2025-03-07", "status": "pending"}}``.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    ids = request.data.get('ids') or []
+    filters = request.data.get('filter') or {}
+    if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+        return JsonResponse({'success': False, 'error': 'ids must be a list of integers.'}, status=400)
+    if not isinstance(filters, dict):
+        return JsonResponse({'success': False, 'error': 'filter must be an object.'}, status=400)
+    out_date = filters.get('out_date')
+    if out_date is not None:
+        try:
+            out_date = parse_date(str(out_date))
+        except ValueError:
+            out_date = None
+        if out_date is None:
+            return JsonResponse({'success': False, 'error': 'Invalid out_date.'}, status=400)
+    try:
+        queryset = decision_queryset(ids=ids, out_date=out_date, status=filters.get('status'))
+        updated = decide(queryset, request.data.get('decision'))
+    except DecisionError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'updated': updated})
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 @parser_classes([MultiPartParser, FormParser])
 def posts_api(request):
     if request.method == 'GET':
-        qs = Post.objects.order_by('-created_at')
-        return Response({
+        etag, last_modified = compute_validators(
+            Post.objects.all(), 'updated_at', request.get_full_path(), request.user.pk
+        )
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+        qs = Post.objects.select_related('author')
+        q = request.GET.get('q', '').strip()
+        if q:
+            posts, next_page = search_page(qs, request, q)
+            context = {'request': request, 'liked_post_ids': liked_post_ids(request.user, posts)}
+            return set_validators(Response({
+                'success': True,
+                'posts': PostListSerializer(posts, many=True, context=context).data,
+                'next_page': next_page,
+            }), etag, last_modified)
+        try:
+            posts, next_cursor = keyset_paginate(qs, request)
+        except InvalidCursor:
+            return Response({'success': False, 'error': 'Invalid cursor.'}, status=400)
+        context = {'request': request, 'liked_post_ids': liked_post_ids(request.user, posts)}
+        return set_validators(Response({
             'success': True,
-            'posts': PostSerializer(qs, many=True, context={'request': request}).data
-        })
+            'posts': PostListSerializer(posts, many=True, context=context).data,
+            'next_cursor': next_cursor,
+        }), etag, last_modified)
     serializer = PostSerializer(data=request.data, context={'request': request})
     serializer.is_valid(raise_exception=True)
     serializer.save()
     return Response({'success': True, 'post': serializer.data})
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def hot_posts_api(request):
+    size = get_page_size(request)
+    post_ids = list(PostScore.objects.order_by('-score').values_list('post_id', flat=True)[:size])
+    by_id = Post.objects.select_related('author').in_bulk(post_ids)
+    posts = [by_id[pk] for pk in post_ids if pk in by_id]
+    context = {'request': request, 'liked_post_ids': liked_post_ids(request.user, posts)}
+    return Response({
+        'success': True,
+        'posts': PostListSerializer(posts, many=True, context=context).data,
+    })
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthorOrAdmin])
@@ -284,7 +511,8 @@ def post_detail_api(request, pk):
         return Response({'success': False, 'error': 'Permission denied.'}, status=403)
 
     if request.method == 'GET':
-        return Response({'success': True, 'post': PostSerializer(post, context={'request': request}).data})
+        context = {'request': request, 'liked_post_ids': liked_post_ids(request.user, [post])}
+        return Response({'success': True, 'post': PostSerializer(post, context=context).data})
     if request.method == 'PUT':
         serializer = PostSerializer(post, data=request.data, partial=True, context={'request': request})
         serializer.is_valid(raise_exception=True)
@@ -303,14 +531,86 @@ def comments_api(request, post_id):
     except Post.DoesNotExist:
         return Response({'success': False, 'error': 'Post not found'}, status=404)
     if request.method == 'GET':
-        qs = post.comments.order_by('created_at')
-        return Response({'success': True, 'comments': CommentSerializer(qs, many=True, context={'request': request}).data})
+        order = request.GET.get('order', 'oldest')
+        if order not in ('oldest', 'newest'):
+            return Response({'success': False, 'error': "order must be 'oldest' or 'newest'."}, status=400)
+        size = get_page_size(request, default=settings.COMMENTS_PAGE_SIZE)
+        try:
+            comments, next_cursor = keyset_paginate(
+                post.comments.select_related('author'), request,
+                descending=(order == 'newest'), page_size=size
+            )
+        except InvalidCursor:
+            return Response({'success': False, 'error': 'Invalid cursor.'}, status=400)
+        return Response({
+            'success': True,
+            'comments': CommentSerializer(comments, many=True, context={'request': request}).data,
+            'next_cursor': next_cursor,
+            'total': post.comment_count,
+        })
     serializer = CommentSerializer(data={'content': request.data.get('content')}, context={'request': request})
     serializer.is_valid(raise_exception=True)
-    serializer.save(post=post)
+    with transaction.atomic():
+        serializer.save(post=post)
     return Response({'success': True, 'comment': serializer.data})
 
 
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def sync_api(request):
+    user = request.user
+    sections = ['notices', 'posts', 'comments', 'outings', 'inquiry_answers', 'deleted']
+    token = request.GET.get('since')
+    try:
+        cursors = decode_token(token, sections)
+    except InvalidSyncToken:
+        return Response({'success': False, 'error': 'Invalid sync token.'}, status=400)
+    if token and cursors['deleted'][0] < timezone.now() - tombstone_retention():
+        return Response({'success': False, 'error': 'Sync token expired; full resync required.'}, status=410)
+
+    limit = getattr(settings, 'SYNC_PAGE_SIZE', 200)
+    outings = OutingApply.objects.all()
+    answers = InquiryAnswer.objects.select_related('admin')
+    tombstones = Tombstone.objects.all()
+    if not user.is_staff:
+        outings = outings.filter(user=user)
+        answers = answers.filter(inquiry__user=user)
+        tombstones = tombstones.filter(Q(user_id__isnull=True) | Q(user_id=user.id))
+
+    plan = {
+        'notices': (Notice.objects.all(), 'updated_at'),
+        'posts': (Post.objects.select_related('author'), 'updated_at'),
+        'comments': (Comment.objects.select_related('author'), 'created_at'),
+        'outings': (outings, 'updated_at'),
+        'inquiry_answers': (answers, 'updated_at'),
+        'deleted': (tombstones, 'deleted_at'),
+    }
+    rows, next_cursors, has_more = {}, {}, False
+    for section, (queryset, field) in plan.items():
+        rows[section], next_cursors[section], more = changes_since(queryset, field, cursors[section], limit)
+        has_more = has_more or more
+
+    post_context = {'request': request, 'liked_post_ids': liked_post_ids(user, rows['posts'])}
+    return Response({
+        'success': True,
+        'notices': NoticeSerializer(rows['notices'], many=True).data,
+        'posts': PostListSerializer(rows['posts'], many=True, context=post_context).data,
+        'comments': [
+            dict(data, post_id=comment.post_id)
+            for comment, data in zip(rows['comments'], CommentSerializer(rows['comments'], many=True).data)
+        ],
+        'outings': OutingApplySerializer(rows['outings'], many=True).data,
+        'inquiry_answers': [
+            dict(data, inquiry_id=answer.inquiry_id)
+            for answer, data in zip(rows['inquiry_answers'], InquiryAnswerSerializer(rows['inquiry_answers'], many=True).data)
+        ],
+        'deleted': [{'type': t.kind, 'id': t.object_id} for t in rows['deleted']],
+        'token': encode_token(next_cursors),
+        'has_more': has_more,
+    })
+
+
 @api_view(['GET', 'POST'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -371,6 +671,213 @@ def dorm_applications_list_api(request):
     return JsonResponse({'success': True, 'dorms': data})
 
 
+def parse_date_range(request):
+    """``?from=`` and ``?to=`` as dates (either may be omitted); ValueError on bad input."""
+    bounds = []
+    for key in ('from', 'to'):
+        value = request.GET.get(key)
+        if not value:
+            bounds.append(None)
+            continue
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(f'Invalid {key} date.')
+        bounds.append(parsed)
+    return bounds
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def export_dorm_applications_api(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    queryset = exports.dorm_applications(
+        building=request.GET.get('building'), gender=request.GET.get('gender'),
+    )
+    return exports.stream_csv('dorm_applications.csv', exports.DORM_COLUMNS, queryset)
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def export_outings_api(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    status = request.GET.get('status')
+    if status and status not in dict(OutingApply.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Invalid status.'}, status=400)
+    try:
+        date_from, date_to = parse_date_range(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    queryset = exports.outing_applications(
+        date_from=date_from, date_to=date_to, status=status, building=request.GET.get('building'),
+    )
+    return exports.stream_csv('outings.csv', exports.OUTING_COLUMNS, queryset)
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def export_users_api(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    try:
+        date_from, date_to = parse_date_range(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    queryset = exports.user_roster(
+        date_from=date_from, date_to=date_to, building=request.GET.get('building'),
+    )
+    return exports.stream_csv('users.csv', exports.USER_COLUMNS, queryset)
+
+
+def parse_dorm_update(item):
+    if not isinstance(item, dict):
+        return None, 'Each update must be an object.'
+    try:
+        pk = int(item.get('id'))
+    except (TypeError, ValueError):
+        return None, 'Missing or invalid id.'
+    changes = {}
+    if item.get('building_name') is not None:
+        changes['building_name'] = str(item['building_name'])
+    for field in ('r_number', 'position'):
+        if item.get(field) is None:
+            continue
+        try:
+            changes[field] = int(item[field])
+        except (TypeError, ValueError):
+            return pk, f'Invalid {field}.'
+    if 'position' in changes and changes['position'] not in (0, 1, 2, 3, 4):
+        return pk, 'Invalid position.'
+    if not changes:
+        return pk, 'No fields to update.'
+    return pk, changes
+
+
+@api_view(['PATCH'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def dorm_applications_bulk_update_api(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    items = request.data.get('updates')
+    limit = getattr(settings, 'BULK_UPDATE_MAX_ITEMS', 1000)
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'success': False, 'error': 'updates must be a non-empty list.'}, status=400)
+    if len(items) > limit:
+        return JsonResponse({'success': False, 'error': f'At most {limit} updates per request.'}, status=400)
+
+    results = []
+    changes_by_id = {}
+    for item in items:
+        pk, changes = parse_dorm_update(item)
+        if isinstance(changes, str):
+            results.append({'id': pk, 'success': False, 'error': changes})
+        elif pk in changes_by_id:
+            results.append({'id': pk, 'success': False, 'error': 'Duplicate id in batch.'})
+        else:
+            changes_by_id[pk] = changes
+            results.append({'id': pk, 'success': True})
+
+    with transaction.atomic():
+        dorms = Dorm.objects.select_for_update().select_related('user').in_bulk(list(changes_by_id))
+        for dorm_id, changes in changes_by_id.items():
+            if dorm_id in dorms:
+                for field, value in changes.items():
+                    setattr(dorms[dorm_id], field, value)
+
+        # Bed clashes: inside the batch, and against applicants left untouched.
+        wanted = {}
+        for dorm in dorms.values():
+            if dorm.building_name and dorm.r_number and dorm.position:
+                wanted.setdefault((dorm.building_name, dorm.r_number, dorm.position), []).append(dorm.id)
+        taken = set()
+        if wanted:
+            taken = set(
+                Dorm.objects.filter(
+                    building_name__in={bed[0] for bed in wanted},
+                    r_number__in={bed[1] for bed in wanted},
+                    position__in={bed[2] for bed in wanted},
+                ).exclude(id__in=list(dorms)).values_list('building_name', 'r_number', 'position')
+            )
+        clashes = {
+            dorm_id
+            for bed, dorm_ids in wanted.items()
+            if len(dorm_ids) > 1 or bed in taken
+            for dorm_id in dorm_ids
+        }
+
+        for result in results:
+            if not result['success']:
+                continue
+            if result['id'] not in dorms:
+                result.update(success=False, error='Dorm application not found.')
+            elif result['id'] in clashes:
+                result.update(success=False, error='Bed already assigned.')
+
+        if not all(result['success'] for result in results):
+            return JsonResponse({'success': False, 'error': 'No updates applied.', 'results': results}, status=400)
+
+        try:
+            sync_beds(dorms.values())
+        except BedUnavailable as e:
+            for result in results:
+                if bed_key(dorms[result['id']]) in e.beds:
+                    result.update(success=False, error=str(e))
+            return JsonResponse({'success': False, 'error': 'No updates applied.', 'results': results}, status=409)
+        Dorm.objects.bulk_update(list(dorms.values()), ['building_name', 'r_number', 'position'])
+
+    for result in results:
+        result['application'] = DormSerializer(dorms[result['id']]).data
+    return JsonResponse({'success': True, 'results': results})
+
+
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def allocate_rooms_api(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    try:
+        result = allocate_rooms(
+            request.data.get('buildings'),
+            priority=request.data.get('priority', 'net_points'),
+            dry_run=bool(request.data.get('dry_run', False)),
+        )
+    except AllocationError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except BedUnavailable as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    return JsonResponse({'success': True, 'allocation': result})
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def room_vacancies_api(request):
+    """Free beds grouped by building, floor and gender. Filters: ?building=, ?floor=, ?gender=."""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    gender = request.GET.get('gender') or None
+    if gender is not None and gender not in {value for value, _ in Dorm.GENDER_CHOICES}:
+        return JsonResponse({'success': False, 'error': 'Invalid gender.'}, status=400)
+    try:
+        floor = int(request.GET['floor']) if request.GET.get('floor') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid floor.'}, status=400)
+    groups = vacancies(building=request.GET.get('building') or None, floor=floor, gender=gender)
+    return JsonResponse({
+        'success': True,
+        'free_beds': sum(group['free_beds'] for group in groups),
+        'vacancies': groups,
+    })
+
+
 @api_view(['GET', 'PATCH', 'DELETE'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -412,7 +919,12 @@ def dorm_application_detail_api(request, pk):
             updated = True
 
         if updated:
-            dorm.save()
+            try:
+                with transaction.atomic():
+                    sync_beds([dorm])
+                    dorm.save()
+            except BedUnavailable as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=409)
             return JsonResponse({'success': True, 'application': DormSerializer(dorm).data})
         else:
             return JsonResponse({'success': False, 'error': 'No fields to update.'}, status=400)
@@ -430,12 +942,46 @@ def like_post_api(request, pk):
     except Post.DoesNotExist:
         return Response({'success': False, 'error': 'Post not found'}, status=404)
     user = request.user
-    like_obj, created = Like.objects.get_or_create(user=user, post=post)
-    if not created:
-        like_obj.delete()
-        return Response({'is_liked': False, 'like_count': post.likes.count()})
-    return Response({'is_liked': True, 'like_count': post.likes.count()})
+    with transaction.atomic():
+        like_obj, created = Like.objects.get_or_create(user=user, post=post)
+        if not created:
+            like_obj.delete()
+    post.refresh_from_db(fields=['like_count'])
+    return Response({'is_liked': created, 'like_count': post.like_count})
     
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def admin_user_list_api(request):
+    """
+    Paged user list for the admin screens. Filters: ?q= (student number
+    prefix), ?department=, ?building=, ?is_staff=true|false. Profiles and
+    dorms come from the same query, so the page size does not change the
+    query count.
+    """
+    if not request.user.is_staff:
+        return Response({'success': False, 'error': 'Permission denied.'}, status=403)
+    users = User.objects.select_related('userprofile', 'dorm')
+    if request.GET.get('q'):
+        users = users.filter(username__startswith=request.GET['q'].strip())
+    if request.GET.get('department'):
+        users = users.filter(userprofile__department=request.GET['department'])
+    if request.GET.get('building'):
+        users = users.filter(dorm__building_name=request.GET['building'])
+    if request.GET.get('is_staff') in ('true', 'false'):
+        users = users.filter(is_staff=request.GET['is_staff'] == 'true')
+
+    size = get_page_size(request)
+    page = get_page_number(request)
+    offset = (page - 1) * size
+    rows = list(users.order_by('username', 'id')[offset:offset + size + 1])
+    return Response({
+        'success': True,
+        'users': UserAdminDetailSerializer(rows[:size], many=True).data,
+        'next_page': page + 1 if len(rows) > size else None,
+    })
+
+
 @api_view(['GET', 'PATCH', 'DELETE'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -443,7 +989,7 @@ def admin_user_detail_api(request, user_id):
     if not request.user.is_staff:
         return Response({'success': False, 'error': 'Permission denied.'}, status=403)
     try:
-        user = User.objects.get(pk=user_id)
+        user = User.objects.select_related('userprofile', 'dorm').get(pk=user_id)
     except User.DoesNotExist:
         return Response({'success': False, 'error': 'User not found.'}, status=404)
 
@@ -454,46 +1000,81 @@ def admin_user_detail_api(request, user_id):
     elif request.method == 'PATCH':
         serializer = UserAdminDetailSerializer(user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except BedUnavailable as e:
+                return Response({'success': False, 'error': str(e)}, status=409)
             return Response({'success': True, 'user': serializer.data})
         return Response({'success': False, 'error': serializer.errors}, status=400)
 
     elif request.method == 'DELETE':
         user.delete()
         return Response({'success': True, 'message': 'User deleted.'}, status=204)
-        
-def user_search_list_api(request):
-    student_number_query = request.GET.get("student_number", "")
-    if not student_number_query:
-        return JsonResponse({"success": False, "error": "needs student parameter"})
-
-    user_profiles = UserProfile.objects.filter(user__username__icontains=student_number_query)
-    dorms = Dorm.objects.filter(student_number__icontains=student_number_query)
 
-    results = []
-
-    for profile in user_profiles:
-        full_name = profile.full_name or profile.user.get_full_name() or profile.user.username
-        results.append({
-            "id": profile.user.id,
-            "fullName": full_name,
-            "studentNumber": profile.user.username or "",
-            "department": profile.department or "",
-        })
-
-    dorm_user_ids = [profile.user.id for profile in user_profiles]
-    dorm_only = dorms.exclude(user__id__in=dorm_user_ids)
-
-    for dorm in dorm_only:
-        results.append({
-            "id": dorm.user.id if dorm.user else None,
-            "fullName": dorm.name or "",
-            "studentNumber": dorm.student_number or "",
-            "department": "",
-        })
 
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def user_search_list_api(request):
+    """
+    Staff search and autocomplete: students whose number or name starts
+    with ?q= (or the older ?student_number=), paged by ?page= and ?page_size=.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    query = (request.GET.get('q') or request.GET.get('student_number') or '').strip()
+    if not query:
+        return JsonResponse({"success": False, "error": "needs student parameter"}, status=400)
+    size = get_page_size(request, default=10, maximum=50)
+    page = get_page_number(request)
+    results, has_more = search_students(query, offset=(page - 1) * size, limit=size)
     return JsonResponse({
         "success": True,
         "users": results,
+        "next_page": page + 1 if has_more else None,
         "error": None,
     })
+
+
+async def event_stream_api(request):
+    """
+    Server-Sent Events feed of new comments, like-count changes and notices.
+    Needs an ASGI server (finalproject.asgi:application): WSGI would buffer
+    the endless stream and hold a worker per client, so it gets a 501.
+    Filters: ?topics=comment,like,notice and ?post=<id>. Reconnecting
+    clients resume from their Last-Event-ID.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'success': False, 'error': 'Event stream requires an ASGI server.'}, status=501)
+    topics = set(filter(None, request.GET.get('topics', ','.join(TOPICS)).split(',')))
+    if not topics <= set(TOPICS):
+        return JsonResponse({'success': False, 'error': f"topics must be among {', '.join(TOPICS)}."}, status=400)
+    try:
+        post_id = int(request.GET['post']) if request.GET.get('post') else None
+        last_event_id = request.headers.get('Last-Event-ID')
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid post or Last-Event-ID.'}, status=400)
+
+    heartbeat = getattr(settings, 'EVENTS_HEARTBEAT_SECONDS', 15)
+
+    async def stream():
+        yield f"retry: {heartbeat * 1000}\n\n"
+        async with get_backend().subscribe(last_event_id) as events:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event['topic'] not in topics:
+                    continue
+                if post_id is not None and event['data'].get('post_id') not in (None, post_id):
+                    continue
+                yield format_event(event)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
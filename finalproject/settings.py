@@ -104,11 +104,51 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+IMAGE_VARIANT_WORKERS = 2
+# Processes hashing passwords for bulk user imports; 0 hashes inline.
+PROVISIONING_HASH_WORKERS = 4
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Cached notice pages are invalidated by bumping a version key, so every
+# worker must share one cache (Memcached/Redis) in production.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+NOTICES_CACHE_TIMEOUT = 60 * 60 * 24
+LEADERBOARD_CACHE_TIMEOUT = 30
+
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+COMMENTS_PAGE_SIZE = 50
+SEARCH_MAX_RESULTS = 500
+
+BULK_UPDATE_MAX_ITEMS = 1000
+
+# Rows fetched per round trip by the streaming CSV exports.
+EXPORT_CHUNK_SIZE = 2000
+
+SYNC_PAGE_SIZE = 200
+SYNC_OVERLAP_SECONDS = 30
+SYNC_TOMBSTONE_DAYS = 30
+
+# LocalBackend only reaches clients of the same process; with several
+# workers use 'dorm.events.DatabaseBackend', which shares events through
+# the database.
+EVENTS_BACKEND = 'dorm.events.LocalBackend'
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_POLL_SECONDS = 1
+EVENTS_RETENTION_SECONDS = 600
+
+HOT_POSTS_WINDOW_DAYS = 7
+HOT_POSTS_LIKE_WEIGHT = 1.0
+HOT_POSTS_COMMENT_WEIGHT = 2.0
+HOT_POSTS_GRAVITY = 1.5
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
@@ -3,25 +3,41 @@ from django.urls import path, include
 
 from dorm.views import (
     signup_api,
+    import_users_api,
     login_api,
     mypage_api,
     give_point_api,
+    award_points_api,
+    point_history_api,
+    leaderboard_api,
     apply_dorm_api,
     apply_outing_api,
     notices_api,
     posts_api,
+    hot_posts_api,
     post_detail_api,
     comments_api,
     inquiries_api,
     inquiry_detail_api,
     dorm_applications_list_api,
     dorm_application_detail_api,
+    allocate_rooms_api,
+    dorm_applications_bulk_update_api,
+    room_vacancies_api,
+    export_dorm_applications_api,
+    export_outings_api,
+    export_users_api,
     outing_apply_status_api,
     approve_outing_api,
     reject_outing_api,
+    bulk_decide_outings_api,
+    outing_roster_api,
     like_post_api,
+    admin_user_list_api,
     admin_user_detail_api,
     user_search_list_api,
+    event_stream_api,
+    sync_api,
 )
 
 from django.conf import settings
@@ -31,28 +47,45 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 
     path('api/signup/', signup_api, name='signup_api'),
+    path('api/users/import/', import_users_api, name='import_users_api'),
     path('api/login/', login_api, name='login_api'),
     path('api/mypage/', mypage_api, name='mypage_api'),
     path('api/give_point/', give_point_api, name='give_point_api'),
+    path('api/points/award/', award_points_api, name='award_points_api'),
+    path('api/points/history/', point_history_api, name='point_history_api'),
+    path('api/points/leaderboard/', leaderboard_api, name='leaderboard_api'),
 
     path('api/dorm_apply/', apply_dorm_api, name='dorm_apply_api'),
     path('api/dorm-applications/', dorm_applications_list_api, name='dorm_applications_list_api'),
+    path('api/dorm-applications/bulk/', dorm_applications_bulk_update_api, name='dorm_applications_bulk_update_api'),
+    path('api/dorm-applications/allocate/', allocate_rooms_api, name='allocate_rooms_api'),
+    path('api/exports/dorm-applications/', export_dorm_applications_api, name='export_dorm_applications_api'),
+    path('api/exports/outings/', export_outings_api, name='export_outings_api'),
+    path('api/exports/users/', export_users_api, name='export_users_api'),
+    path('api/rooms/vacancies/', room_vacancies_api, name='room_vacancies_api'),
     path('api/dorm-applications/<int:pk>/', dorm_application_detail_api, name='dorm_application_detail_api'),
 
     path('api/outing_apply/', apply_outing_api, name='outing_apply_api'),
     path('api/sleepover/status/', outing_apply_status_api, name='sleepover_status_api'),
     path('api/sleepover/approve/<int:pk>/', approve_outing_api, name='sleepover_approve_api'),
     path('api/sleepover/reject/<int:pk>/', reject_outing_api, name='sleepover_reject_api'),
+    path('api/sleepover/decide/', bulk_decide_outings_api, name='sleepover_decide_api'),
+    path('api/sleepover/roster/', outing_roster_api, name='sleepover_roster_api'),
 
     path('api/notices/', notices_api, name='notices_api'),
     path('api/posts/', posts_api, name='posts_api'),
+    path('api/posts/hot/', hot_posts_api, name='hot_posts_api'),
     path('api/posts/<int:pk>/', post_detail_api, name='post_detail_api'),
     path('api/posts/<int:pk>/like/', like_post_api, name='like_post_api'),
     path('api/posts/<int:post_id>/comments/', comments_api, name='comments_api'),
 
+    path('api/events/', event_stream_api, name='event_stream_api'),
+    path('api/sync/', sync_api, name='sync_api'),
+
     path('api/inquiries/', inquiries_api, name='inquiries_api'),
     path('api/inquiries/<int:pk>/', inquiry_detail_api, name='inquiry_detail_api'),
 
+    path('api/admin/users/', admin_user_list_api, name='admin_user_list_api'),
     path('api/admin/user/<int:user_id>/', admin_user_detail_api, name='admin_user_detail_api'),
     path('api/admin/user-search/', user_search_list_api, name='user_search_list_api'),
 
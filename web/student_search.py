@@ -0,0 +1,71 @@
+import re
+from typing import NamedTuple, Optional
+
+from dorm.models import UserProfile
+
+
+class SearchField(NamedTuple):
+    label: str
+    lookup: str
+    kind: str                      # 'prefix', 'exact', 'number' or 'choice'
+    choices: Optional[dict] = None
+
+
+# The only fields the admin search accepts. Text fields match by prefix so
+# they can use an index; numbers match exactly or as a "10-20" range.
+STUDENT_SEARCH_FIELDS = {
+    'full_name': SearchField('이름', 'full_name', 'prefix'),
+    'student_number': SearchField('학번', 'user__username', 'prefix'),
+    'department': SearchField('학과', 'department', 'prefix'),
+    'phone_number': SearchField('전화 번호', 'phone_number', 'prefix'),
+    'building_name': SearchField('건물명', 'user__dorm__building_name', 'exact'),
+    'r_number': SearchField('호수', 'user__dorm__r_number', 'number'),
+    'gender': SearchField('성별', 'user__dorm__gender', 'choice', {
+        '남자': 'male', '남': 'male', 'male': 'male',
+        '여자': 'female', '여': 'female', 'female': 'female',
+    }),
+    'reward_point': SearchField('상점', 'reward_point', 'number'),
+    'penalty_point': SearchField('벌점', 'penalty_point', 'number'),
+}
+
+_RANGE_RE = re.compile(r'^(-?\d+)\s*[-~]\s*(-?\d+)$')
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def _condition(spec, query):
+    if spec.kind == 'prefix':
+        return {f'{spec.lookup}__startswith': query}
+    if spec.kind == 'exact':
+        return {spec.lookup: query}
+    if spec.kind == 'choice':
+        value = spec.choices.get(query.lower())
+        if value is None:
+            raise InvalidSearch(f"{spec.label}: 올바른 값을 입력하세요.")
+        return {spec.lookup: value}
+    match = _RANGE_RE.match(query)
+    if match:
+        low, high = sorted(int(n) for n in match.groups())
+        return {f'{spec.lookup}__range': (low, high)}
+    try:
+        return {spec.lookup: int(query)}
+    except ValueError:
+        raise InvalidSearch(f"{spec.label}: 숫자 또는 10-20 형태의 범위를 입력하세요.")
+
+
+def search_profiles(field, query):
+    """
+    Profiles matching ``query`` on one of STUDENT_SEARCH_FIELDS, with the
+    user and dorm joined in the same query. Raises InvalidSearch for an
+    unlisted field or a value the field cannot take.
+    """
+    spec = STUDENT_SEARCH_FIELDS.get(field)
+    if spec is None:
+        raise InvalidSearch("검색할 수 없는 항목입니다.")
+    return (
+        UserProfile.objects.filter(**_condition(spec, query))
+        .select_related('user', 'user__dorm')
+        .order_by('full_name', 'id')
+    )
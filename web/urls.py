@@ -40,6 +40,8 @@ urlpatterns = [
     path('outinfo/', views.outing_info, name='outing_info'),
     path('outinfo/approve/<int:pk>/', views.approve_outing, name='approve_outing'),
     path('outinfo/reject/<int:pk>/', views.reject_outing, name='reject_outing'),
+    path('outinfo/decide/', views.bulk_decide_outings, name='bulk_decide_outings'),
+    path('outinfo/roster/', views.outing_roster, name='outing_roster'),
     path('reward/', views.reward_penalty, name='reward_penalty'),
     path('dorminfo/', views.dorm_info_view, name='dorm_info'),
     path('assign_room/<int:dorm_id>/', views.assign_room, name='assign_room'),
@@ -1,20 +1,38 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login as auth_login, logout, login
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.auth.models import User
+from django.db import transaction
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_POST
 from django.views.generic import TemplateView
 from dorm.models import Notice, UserProfile, Post, Comment, Inquiry, InquiryAnswer, Dorm, OutingApply, Like
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.shortcuts import get_object_or_404
-from django.core.paginator import Paginator
-
+from django.core.paginator import Page, Paginator
+
+from dorm.cache import cached_notices
+from dorm.occupancy import BedUnavailable, sync_beds
+from dorm.outings import DecisionError, decide, decision_queryset
+from dorm.points import PointError, award
+from dorm.roster import roster
+from dorm.pagination import InvalidCursor, get_page_size, keyset_paginate
+from dorm.search import search_ids
+from web.student_search import STUDENT_SEARCH_FIELDS, InvalidSearch, search_profiles
 from web.forms import CustomSignupForm, CommentForm, PostForm, InquiryForm, InquiryAnswerForm, OutingApplyForm, \
     NoticeForm
 
 
+def search_page_obj(queryset, kw, page, per_page=10):
+    paginator = Paginator(search_ids(queryset.model, kw), per_page)
+    page_obj = paginator.get_page(page)
+    objs = queryset.in_bulk(page_obj.object_list)
+    page_obj.object_list = [objs[pk] for pk in page_obj.object_list if pk in objs]
+    return page_obj
+
+
 def index(request):
     return render(request, 'web/index.html')
 
@@ -34,7 +52,6 @@ def mypage_view(request):
         inquiries = Inquiry.objects.all().order_by('-created_at')
 
     form = InquiryForm()
-    students = []
 
     if request.method == 'POST':
         form = InquiryForm(request.POST)
@@ -46,43 +63,18 @@ def mypage_view(request):
     else:
         form = InquiryForm()
 
+    students = None
+    search_error = None
     if is_admin and 'query' in request.GET and 'field' in request.GET:
         query = request.GET.get('query', '').strip()
         field = request.GET.get('field', '').strip()
 
         if query and field:
-            if field == 'gender':
-                gender_map = {'남자': 'male', '여자': 'female'}
-                gender_value = gender_map.get(query)
-                if gender_value:
-                    dorm_user_ids = Dorm.objects.filter(gender=gender_value).values_list('user_id', flat=True)
-                    students = UserProfile.objects.filter(user_id__in=dorm_user_ids).order_by('full_name')
-                else:
-                    students = UserProfile.objects.none()
-
-            elif field == 'building_name':
-                dorm_user_ids = Dorm.objects.filter(building_name__icontains=query).values_list('user_id', flat=True)
-                students = UserProfile.objects.filter(user_id__in=dorm_user_ids).order_by('full_name')
-
-            elif field == 'r_number':
-                dorm_user_ids = Dorm.objects.filter(r_number__icontains=query).values_list('user_id', flat=True)
-                students = UserProfile.objects.filter(user_id__in=dorm_user_ids).order_by('full_name')
-
-            elif field == 'student_number':
-                students = UserProfile.objects.filter(user__username__icontains=query).order_by('full_name')
-
-            elif field == 'phone_number':
-                students = UserProfile.objects.filter(phone_number__icontains=query).select_related('user').order_by('full_name')
-
-            elif field == 'reward_point':
-                students = UserProfile.objects.filter(reward_point__icontains=query).select_related('user').order_by('full_name')
-
-            elif field == 'penalty_point':
-                students = UserProfile.objects.filter(penalty_point__icontains=query).select_related('user').order_by('full_name')
-
-            else:
-                filter_kwargs = {f"{field}__icontains": query}
-                students = UserProfile.objects.filter(**filter_kwargs).order_by('full_name')
+            try:
+                matches = search_profiles(field, query)
+                students = Paginator(matches, 20).get_page(request.GET.get('page'))
+            except InvalidSearch as e:
+                search_error = str(e)
 
     context = {
         'user': user,
@@ -91,6 +83,8 @@ def mypage_view(request):
         'inquiries': inquiries,
         'form': form,
         'students': students,
+        'search_fields': STUDENT_SEARCH_FIELDS,
+        'search_error': search_error,
     }
     return render(request, 'web/mypage.html', context)
 
@@ -129,14 +123,24 @@ def inquiry_detail_view(request, pk):
 
 def notice_list(request):
     kw = request.GET.get('kw', '')
-    notices = Notice.objects.all()
-    if kw:
-        notices = notices.filter(title__icontains=kw)
-    notices = notices.order_by('-id')
-
-    paginator = Paginator(notices, 10)
     page = request.GET.get('page')
-    page_obj = paginator.get_page(page)
+
+    def build():
+        if kw:
+            page_obj = search_page_obj(Notice.objects.all(), kw, page)
+        else:
+            page_obj = Paginator(Notice.objects.order_by('-id'), 10).get_page(page)
+        return {
+            'count': page_obj.paginator.count,
+            'number': page_obj.number,
+            'notices': list(page_obj.object_list),
+        }
+
+    _, cached = cached_notices(f'page:{kw}:{page}', build)
+    # Seed the paginator's count so page links render without a COUNT query.
+    paginator = Paginator(Notice.objects.none(), 10)
+    paginator.count = cached['count']
+    page_obj = Page(cached['notices'], cached['number'], paginator)
 
     return render(request, 'web/notice.html', {
         'notices': page_obj,
@@ -245,7 +249,10 @@ def outside(request):
     if request.method == 'POST':
         form = OutingApplyForm(request.POST)
         if form.is_valid():
-            form.save()
+            outing = form.save(commit=False)
+            if outing.student_number == request.user.username:
+                outing.user = request.user
+            outing.save()
             request.session['show_success_alert'] = True
             return redirect('web:apply_success')
     else:
@@ -267,10 +274,7 @@ def outing_info(request):
     if request.user.is_staff:
         applications = OutingApply.objects.all()
     else:
-        applications = OutingApply.objects.filter(
-            name=request.user.userprofile.full_name,
-            student_number=request.user.username
-        )
+        applications = OutingApply.objects.filter(user=request.user)
     return render(request, 'web/outinfo.html', {
         'applications': applications,
         'is_admin': request.user.is_staff
@@ -294,18 +298,57 @@ def reject_outing(request, pk):
     outing.save()
     return redirect('web:outing_info')
 
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
-def community_home(request):
-    kw = request.GET.get('kw', '')
-    post_list = Post.objects.all().order_by('-created_at')
+def outing_roster(request):
+    try:
+        day = parse_date(request.GET.get('date') or '')
+    except ValueError:
+        day = None
+    if day is None:
+        if request.GET.get('date'):
+            messages.error(request, "날짜 형식이 올바르지 않아 오늘 명단을 표시합니다.")
+        day = timezone.localdate()
+    return render(request, 'web/outing_roster.html', {'roster': roster(day)})
 
-    if kw:
-        post_list = post_list.filter(title__icontains=kw)
 
-    paginator = Paginator(post_list, 10)  
+@require_POST
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def bulk_decide_outings(request):
+    ids = [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+    out_date = None
+    if not ids and request.POST.get('out_date'):
+        try:
+            out_date = parse_date(request.POST['out_date'])
+        except ValueError:
+            pass
+        if out_date is None:
+            messages.error(request, "날짜 형식이 올바르지 않습니다.")
+            return redirect('web:outing_info')
+    if not ids and out_date is None:
+        messages.error(request, "처리할 신청을 선택하거나 날짜를 입력하세요.")
+        return redirect('web:outing_info')
+    try:
+        queryset = decision_queryset(ids=ids, out_date=out_date, status='pending')
+        updated = decide(queryset, request.POST.get('decision'))
+    except DecisionError as e:
+        messages.error(request, str(e))
+        return redirect('web:outing_info')
+    messages.success(request, f"{updated}건을 처리했습니다.")
+    return redirect('web:outing_info')
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def community_home(request):
+    kw = request.GET.get('kw', '')
     page = request.GET.get('page')
-    page_obj = paginator.get_page(page)
+    if kw:
+        page_obj = search_page_obj(Post.objects.all(), kw, page)
+    else:
+        paginator = Paginator(Post.objects.order_by('-created_at'), 10)
+        page_obj = paginator.get_page(page)
 
     return render(request, 'web/community_home.html', {
         'posts': page_obj,
@@ -348,13 +391,23 @@ def community_delete(request, pk):
 @login_required
 def community_detail(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    comments = Comment.objects.filter(post=post).order_by('created_at')
+    size = get_page_size(request, default=settings.COMMENTS_PAGE_SIZE)
+    try:
+        comments, next_cursor = keyset_paginate(
+            Comment.objects.filter(post=post).select_related('author'), request,
+            descending=False, page_size=size
+        )
+    except InvalidCursor:
+        return redirect('web:community_detail', pk=pk)
     comment_form = CommentForm()
+    is_liked = Like.objects.filter(user=request.user, post=post).exists()
 
     context = {
         'post': post,
         'comments': comments,
+        'next_cursor': next_cursor,
         'comment_form': comment_form,
+        'is_liked': is_liked,
     }
     return render(request, 'web/community_detail.html', context)
 
@@ -368,7 +421,8 @@ def add_comment(request, pk):
             comment = form.save(commit=False)
             comment.post = post
             comment.author = request.user
-            comment.save()
+            with transaction.atomic():
+                comment.save()
         else:
             messages.error(request, '댓글 등록에 실패했습니다.')
 
@@ -380,7 +434,8 @@ def delete_comment(request, comment_id):
     post_pk = comment.post.pk
 
     if comment.author == request.user or request.user.is_staff:
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
         messages.success(request, '댓글이 삭제되었습니다.')
     else:
         messages.error(request, '댓글을 삭제할 권한이 없습니다.')
@@ -470,23 +525,32 @@ def logout_views(request):
     return redirect('web:home')
 
 
+@login_required
+@user_passes_test(lambda u: u.is_staff)
 def reward_penalty(request):
     if request.method == 'POST':
-        student_number = request.POST.get('student_number')
-        points = int(request.POST.get('points', 0))
+        # 여러 학생은 쉼표, 공백 또는 줄바꿈으로 구분
+        student_numbers = request.POST.get('student_number', '').replace(',', ' ').split()
+        try:
+            points = int(request.POST.get('points', 0))
+        except ValueError:
+            points = 0
         point_type = request.POST.get('point_type')
 
         try:
-            user = User.objects.get(username=student_number)
-            profile = user.userprofile
-            if point_type == 'reward':
-                profile.reward_point += points
+            user_ids = award(
+                student_numbers, point_type, points,
+                awarded_by=request.user, reason=request.POST.get('reason', '')[:200],
+            )
+            if len(user_ids) == 1:
+                messages.success(request, f"{student_numbers[0]} 학생에게 {points}점 부여 완료!")
+            else:
+                messages.success(request, f"{len(user_ids)}명에게 {points}점 부여 완료!")
+        except PointError as e:
+            if e.missing:
+                messages.error(request, f"해당 학번의 사용자를 찾을 수 없습니다: {', '.join(e.missing)}")
             else:
-                profile.penalty_point += points
-            profile.save()
-            messages.success(request, f"{user.username} 학생에게 {points}점 부여 완료!")
-        except User.DoesNotExist:
-            messages.error(request, "해당 학번의 사용자를 찾을 수 없습니다.")
+                messages.error(request, str(e))
 
         return redirect('web:reward_penalty')
 
@@ -496,10 +560,10 @@ def reward_penalty(request):
 @login_required
 def toggle_like(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    like, created = Like.objects.get_or_create(user=request.user, post=post)
-
-    if not created:
-        like.delete()
+    with transaction.atomic():
+        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        if not created:
+            like.delete()
     return redirect('web:community_detail', pk=pk)
 
 @require_POST
@@ -509,7 +573,12 @@ def assign_room(request, dorm_id):
     dorm.building_name = request.POST.get('building_name')
     dorm.r_number = request.POST.get('r_number')
     dorm.position = request.POST.get('position')
-    dorm.save()
+    try:
+        with transaction.atomic():
+            sync_beds([dorm])
+            dorm.save()
+    except BedUnavailable as e:
+        messages.error(request, str(e))
     return redirect('web:dorm_info')
 
 @login_required
@@ -535,6 +604,7 @@ def apply_outing(request):
             messages.error(request, "제출한 이름 또는 학번이 로그인 정보와 일치하지 않습니다.")
             return redirect('web:outside')
         OutingApply.objects.create(
+            user=request.user,
             name=name,
             student_number=student_number,
             out_date=request.POST.get('out_date'),
@@ -562,5 +632,10 @@ def assign_room(request, dorm_id):
     dorm.building_name = request.POST.get('building_name')
     dorm.r_number = request.POST.get('r_number')
     dorm.position = request.POST.get('position')
-    dorm.save()
+    try:
+        with transaction.atomic():
+            sync_beds([dorm])
+            dorm.save()
+    except BedUnavailable as e:
+        messages.error(request, str(e))
     return redirect('web:dorm_info')
\ No newline at end of file